@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
-
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
-
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+import orjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from data_collection.data_parser import invalidate_compressed_context
+from database.mongodb_client import MongoDBClient
 from security.admin_auth import require_admin_auth
 
 from .schemas import (
@@ -14,19 +25,86 @@ from .schemas import (
 )
 
 
-router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_auth)])
+# 응답 직렬화는 orjson 사용 (embedding 벡터 등 float 배열이 큰 응답에서 특히 유리)
+router = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(require_admin_auth)],
+    default_response_class=ORJSONResponse,
+)
+
+# 카드고릴라 수집 시 동시에 진행할 최대 요청 수
+DEFAULT_FETCH_CONCURRENCY = 16
+# 임베딩 시 한 번에 묶어서 처리할 카드 수 (임베딩 API 배치 + bulk_write 단위)
+DEFAULT_EMBED_CHUNK_SIZE = 100
+# Atlas Vector Search 인덱스 이름 (vector_store.CardVectorStore와 동일)
+VECTOR_SEARCH_INDEX_NAME = "card_vector_search"
+# 1단계(fetch)에서 생성되는 압축 컨텍스트 JSON 위치
+CTX_DIR = Path("data/cache/ctx")
+
+# 벡터 검색 디버그: 키워드 추출 패턴/불용어 및 doc_type 기본 가중치
+_KEYWORD_RE = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+_STOPWORDS = frozenset({"전월", "실적", "할인", "적립"})
+DEFAULT_DOC_TYPE_WEIGHTS: Dict[str, float] = {
+    "summary": 1.15,
+    "benefit_core": 1.0,
+    "notes": 0.85,
+}
+
+# 통계 엔드포인트 캐시: 대시보드 폴링이 짧은 시간 내 몰려도 MongoDB 조회는 한 번만
+STATS_CACHE_TTL_SECONDS = 5.0
+# 동기 라우트(스레드풀)와 비동기 라우트가 함께 접근하므로 _ctx_cache처럼 락으로 보호 (await 구간은 락 밖)
+_stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_stats_cache_lock = threading.Lock()
+# 무효화 횟수: compute 도중 무효화되면 그 전 데이터로 계산한 결과를 캐시에 넣지 않음
+_stats_cache_generation = 0
+
+
+def _get_mongo_client(request: Request) -> MongoDBClient:
+    """lifespan에서 app.state에 저장한 MongoDBClient 반환 (없으면 싱글톤 생성)"""
+    mongo_client = getattr(request.app.state, "mongo_client", None)
+    return mongo_client or MongoDBClient()
+
+
+async def _get_cached_stats(key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """TTL 동안 통계 결과를 재사용 (만료 시 compute 호출)"""
+    now = time.monotonic()
+    with _stats_cache_lock:
+        cached = _stats_cache.get(key)
+        generation = _stats_cache_generation
+    if cached and now - cached[0] < STATS_CACHE_TTL_SECONDS:
+        return cached[1]
+    value = await compute()
+    with _stats_cache_lock:
+        if generation == _stats_cache_generation:
+            _stats_cache[key] = (now, value)
+    return value
+
+
+def _invalidate_stats_cache():
+    """임베딩 저장/초기화 후 통계 캐시 무효화"""
+    global _stats_cache_generation
+    with _stats_cache_lock:
+        _stats_cache_generation += 1
+        _stats_cache.clear()
+
+
+def _etag_response(request: Request, payload: Dict[str, Any]) -> Response:
+    """응답 본문 해시로 ETag를 붙이고, If-None-Match가 일치하면 304 반환"""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.get("/cards/stats")
-async def get_vector_db_stats():
+async def get_vector_db_stats(request: Request):
     """MongoDB 벡터 DB 통계 확인"""
     try:
-        from database.mongodb_client import MongoDBClient
+        mongo_client = _get_mongo_client(request)
+        stats = await _get_cached_stats("mongo_stats", lambda: asyncio.to_thread(mongo_client.get_stats))
 
-        mongo_client = MongoDBClient()
-        stats = mongo_client.get_stats()
-
-        return {
+        return _etag_response(request, {
             "database": stats.get("database"),
             "collection": stats.get("collection"),
             "total_documents": stats.get("total_documents", 0),
@@ -34,25 +112,24 @@ async def get_vector_db_stats():
             "indexes": stats.get("indexes", []),
             "search_indexes": stats.get("search_indexes", []),
             "vector_search_ready": stats.get("vector_search_ready", False),
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"통계 조회 중 오류가 발생했습니다: {str(e)}")
 
 
 @router.get("/mongodb/health")
-async def mongodb_health_check():
+async def mongodb_health_check(request: Request):
     """MongoDB Atlas 연결 상태 및 인덱스 확인"""
     try:
-        from database.mongodb_client import MongoDBClient
-
-        mongo_client = MongoDBClient()
-        is_connected = mongo_client.health_check()
+        mongo_client = _get_mongo_client(request)
+        is_connected = await asyncio.to_thread(mongo_client.health_check)
 
         if not is_connected:
             return {"status": "disconnected", "message": "MongoDB 연결 실패"}
 
-        stats = mongo_client.get_stats()
-        return {
+        # 연결 확인(ping)은 매번 수행하고, 무거운 통계만 캐시를 공유합니다.
+        stats = await _get_cached_stats("mongo_stats", lambda: asyncio.to_thread(mongo_client.get_stats))
+        return _etag_response(request, {
             "status": "connected",
             "database": stats.get("database"),
             "collection": stats.get("collection"),
@@ -61,104 +138,241 @@ async def mongodb_health_check():
             "indexes": stats.get("indexes", []),
             "search_indexes": stats.get("search_indexes", []),
             "vector_search_ready": stats.get("vector_search_ready", False),
-        }
+        })
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
-async def _fetch_cards_from_cardgorilla(card_client: Any, card_ids: List[int], overwrite: bool):
-    """1단계: 카드고릴라에서 데이터 수집 및 JSON 생성"""
-    results = {"success": [], "failed": [], "skipped": []}
+async def _iter_fetch_cards(
+    card_client: Any,
+    card_ids: List[int],
+    overwrite: bool,
+    concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+) -> AsyncIterator[Tuple[int, str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """카드고릴라 수집 결과를 완료되는 순서대로 (card_id, 상태, 항목, 압축 컨텍스트) 형태로 반환
 
+    네트워크 I/O 위주의 작업이므로 세마포어로 동시 요청 수를 제한한 채 병렬로 수집합니다.
+    (카드고릴라 호출 속도는 card_client 내부 RateLimiter가 별도로 조절)
+    상태는 "success" / "failed" / "skipped" 중 하나입니다.
+    """
     if not card_client:
         raise HTTPException(status_code=503, detail="카드 수집 서비스를 사용할 수 없습니다.")
 
-    for idx, card_id in enumerate(card_ids, 1):
-        try:
-            if idx % 100 == 0:
-                print(f"  진행: {idx}/{len(card_ids)} ({idx*100//len(card_ids)}%)")
-            card_data = await card_client.fetch_card_detail(card_id, use_cache=not overwrite)
-            if card_data:
-                results["success"].append({"card_id": card_id, "name": card_data["meta"]["name"]})
+    total = len(card_ids)
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    done = 0
+
+    async def _fetch_one(card_id: int):
+        nonlocal done
+        async with sem:
+            try:
+                return card_id, await card_client.fetch_card_detail(card_id, use_cache=not overwrite), None
+            except Exception as e:
+                return card_id, None, e
+            finally:
+                done += 1
+                if done % 100 == 0:
+                    print(f"  진행: {done}/{total} ({done*100//total}%)")
+
+    # 명시적 Task로 만들어, SSE 클라이언트 연결 종료 등으로 제너레이터가 중간에 닫히면
+    # 아직 끝나지 않은 수집 작업을 finally에서 취소 (백그라운드에서 계속 요청하지 않도록)
+    tasks = [asyncio.create_task(_fetch_one(cid)) for cid in card_ids]
+    try:
+        for future in asyncio.as_completed(tasks):
+            card_id, card_data, error = await future
+            if error is not None:
+                yield card_id, "failed", {"card_id": card_id, "error": str(error)}, None
+            elif card_data:
+                yield card_id, "success", {"card_id": card_id, "name": card_data["meta"]["name"]}, card_data
             else:
-                results["skipped"].append({"card_id": card_id, "reason": "카드를 찾을 수 없거나 단종됨"})
-        except Exception as e:
-            results["failed"].append({"card_id": card_id, "error": str(e)})
-            continue
+                yield card_id, "skipped", {"card_id": card_id, "reason": "카드를 찾을 수 없거나 단종됨"}, None
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _fetch_cards_from_cardgorilla(
+    card_client: Any,
+    card_ids: List[int],
+    overwrite: bool,
+    concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    preloaded: Optional[Dict[int, Dict[str, Any]]] = None,
+):
+    """1단계: 카드고릴라에서 데이터 수집 및 JSON 생성 (결과는 card_ids 순서로 정리)
 
+    preloaded를 넘기면 수집에 성공한 카드의 압축 컨텍스트를 card_id 키로 채워,
+    이어지는 임베딩 단계가 같은 데이터를 다시 읽지 않도록 합니다.
+    """
+    by_id: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+    async for card_id, status, item, card_data in _iter_fetch_cards(card_client, card_ids, overwrite, concurrency):
+        by_id[card_id] = (status, item)
+        if preloaded is not None and card_data:
+            preloaded[card_id] = card_data
+
+    results = {"success": [], "failed": [], "skipped": []}
+    for card_id in card_ids:
+        status, item = by_id[card_id]
+        results[status].append(item)
     return results
 
 
-async def _embed_cards_to_mongodb(embedding_generator: Any, card_ids: Optional[List[int]], overwrite: bool):
-    """2단계: JSON 파일을 읽어서 임베딩 생성 및 MongoDB 저장"""
-    results = {"success": [], "failed": [], "skipped": []}
+def _load_ctx_json(card_id: int) -> Optional[Dict[str, Any]]:
+    """data/cache/ctx/{card_id}.json 로드 (없으면 None, 바이트로 읽어 orjson으로 디코딩)"""
+    json_file = CTX_DIR / f"{card_id}.json"
+    if not json_file.exists():
+        return None
+    return orjson.loads(json_file.read_bytes())
 
+
+async def _iter_embed_chunks(
+    embedding_generator: Any,
+    card_ids: Optional[List[int]],
+    overwrite: bool,
+    chunk_size: int = DEFAULT_EMBED_CHUNK_SIZE,
+    preloaded: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> AsyncIterator[Dict[str, List[Dict]]]:
+    """JSON 파일을 청크 단위로 임베딩하고, 청크마다 {"success", "failed", "skipped"} 결과를 반환
+
+    preloaded에 있는 카드는 파일을 읽지 않고 그 데이터를 그대로 사용합니다.
+    """
+    preloaded = preloaded or {}
     if not embedding_generator:
         raise HTTPException(status_code=503, detail="임베딩 서비스를 사용할 수 없습니다.")
 
     # card_ids가 없으면 data/cache/ctx 폴더의 모든 JSON 파일 처리
     if not card_ids:
-        from pathlib import Path
-        import json
-
-        ctx_dir = Path("data/cache/ctx")
-        if not ctx_dir.exists():
+        if not await asyncio.to_thread(CTX_DIR.exists):
             print("⚠️  data/cache/ctx 폴더가 없습니다. 먼저 1단계(fetch)를 실행하세요.")
-            return results
+            return
 
-        json_files = list(ctx_dir.glob("*.json"))
+        json_files = await asyncio.to_thread(lambda: list(CTX_DIR.glob("*.json")))
         card_ids = [int(f.stem) for f in json_files]
         print(f"📂 {len(card_ids)}개 JSON 파일 발견")
 
-    for idx, card_id in enumerate(card_ids, 1):
-        try:
-            print(f"  [{idx}/{len(card_ids)}] 카드 ID {card_id} 임베딩 중...")
-            from pathlib import Path
-            import json
-
-            json_file = Path("data/cache/ctx") / f"{card_id}.json"
-            if not json_file.exists():
-                results["skipped"].append({"card_id": card_id, "reason": "JSON 파일 없음"})
+    success_total = 0
+    for offset in range(0, len(card_ids), chunk_size):
+        chunk_ids = card_ids[offset:offset + chunk_size]
+        chunk_results: Dict[str, List[Dict]] = {"success": [], "failed": [], "skipped": []}
+        print(f"  [{offset + 1}~{offset + len(chunk_ids)}/{len(card_ids)}] 카드 {len(chunk_ids)}개 임베딩 중...")
+
+        # JSON 로드 (파일 I/O는 스레드에서)
+        card_data_list: List[Dict[str, Any]] = []
+        for card_id in chunk_ids:
+            if card_id in preloaded:
+                card_data_list.append(preloaded[card_id])
+                continue
+            try:
+                card_data = await asyncio.to_thread(_load_ctx_json, card_id)
+            except Exception as e:
+                chunk_results["failed"].append({"card_id": card_id, "error": f"JSON 로드 실패: {e}"})
                 continue
+            if card_data is None:
+                chunk_results["skipped"].append({"card_id": card_id, "reason": "JSON 파일 없음"})
+                continue
+            card_data_list.append(card_data)
 
-            with open(json_file, "r", encoding="utf-8") as f:
-                card_data = json.load(f)
+        if not card_data_list:
+            yield chunk_results
+            continue
 
-            embedding_generator.add_card(card_data, overwrite=overwrite)
-            results["success"].append({"card_id": card_id, "name": card_data["meta"]["name"]})
-            print(f"  ✅ 카드 ID {card_id} 완료")
+        try:
+            bulk_results = await asyncio.to_thread(embedding_generator.add_cards_bulk, card_data_list, overwrite)
+            for key in ("success", "failed", "skipped"):
+                chunk_results[key].extend(bulk_results.get(key, []))
         except Exception as e:
             error_msg = str(e)
+            chunk_card_ids = [(d.get("meta") or {}).get("id") for d in card_data_list]
 
             # OpenAI 크레딧/할당량 부족 감지
             if "insufficient_quota" in error_msg.lower() or "quota" in error_msg.lower():
                 print("\n💰 OpenAI 크레딧 부족 감지!")
-                print(f"   처리 완료: {len(results['success'])}개")
-                print(f"   미처리: {len(card_ids) - idx}개")
-                print(f"   다음 카드부터 재개: card_id={card_id}")
-                results["failed"].append({"card_id": card_id, "error": "OpenAI 크레딧 부족으로 중단"})
+                print(f"   처리 완료: {success_total}개")
+                print(f"   미처리: {len(card_ids) - offset}개")
+                print(f"   다음 청크부터 재개: card_id={chunk_ids[0]}")
+                for card_id in chunk_card_ids:
+                    chunk_results["failed"].append({"card_id": card_id, "error": "OpenAI 크레딧 부족으로 중단"})
+                yield chunk_results
                 break
 
-            # Rate Limit 감지
-            if "rate_limit" in error_msg.lower():
-                print("  ⏳ Rate Limit 도달, 60초 대기 후 재시도...")
-                import asyncio
+            for card_id in chunk_card_ids:
+                chunk_results["failed"].append({"card_id": card_id, "error": error_msg})
+            print(f"  ❌ 청크 임베딩 실패: {e}")
+
+        if chunk_results["success"]:
+            success_total += len(chunk_results["success"])
+            _invalidate_stats_cache()
+            # 이번 청크에서 실제로 저장된 카드만 무효화
+            # (card_id가 None이면 전체 캐시가 지워지므로 제외)
+            for item in chunk_results["success"]:
+                if item.get("card_id") is not None:
+                    invalidate_compressed_context(item["card_id"])
+        yield chunk_results
+
+
+async def _embed_cards_to_mongodb(
+    embedding_generator: Any,
+    card_ids: Optional[List[int]],
+    overwrite: bool,
+    chunk_size: int = DEFAULT_EMBED_CHUNK_SIZE,
+    preloaded: Optional[Dict[int, Dict[str, Any]]] = None,
+):
+    """2단계: JSON 파일을 읽어서 임베딩 생성 및 MongoDB 저장 (청크 단위 배치 임베딩 + bulk_write)"""
+    results = {"success": [], "failed": [], "skipped": []}
+    async for chunk_results in _iter_embed_chunks(embedding_generator, card_ids, overwrite, chunk_size, preloaded):
+        for key in ("success", "failed", "skipped"):
+            results[key].extend(chunk_results[key])
+    return results
 
-                await asyncio.sleep(60)
-                try:
-                    embedding_generator.add_card(card_data, overwrite=overwrite)
-                    results["success"].append({"card_id": card_id, "name": card_data["meta"]["name"]})
-                    print(f"  ✅ 카드 ID {card_id} 완료 (재시도 성공)")
-                except Exception as retry_error:
-                    results["failed"].append({"card_id": card_id, "error": f"재시도 실패: {str(retry_error)}"})
-                    print(f"  ❌ 카드 ID {card_id} 재시도 실패: {retry_error}")
-                continue
 
-            results["failed"].append({"card_id": card_id, "error": error_msg})
-            print(f"  ❌ 카드 ID {card_id} 실패: {e}")
-            continue
+def _sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Server-Sent Events 한 건 직렬화"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
 
-    return results
+
+async def _stream_fetch(card_client: Any, card_ids: List[int], overwrite: bool, concurrency: int):
+    """/cards/fetch?stream=true: 카드별 결과를 수집 완료 순서대로 SSE로 전송"""
+    counts = {"success": 0, "failed": 0, "skipped": 0}
+    try:
+        async for _card_id, status, item, _card_data in _iter_fetch_cards(card_client, card_ids, overwrite, concurrency):
+            counts[status] += 1
+            yield _sse_event("card", {"status": status, **item})
+        yield _sse_event("summary", {"stage": "fetch", "total_tried": len(card_ids), **counts})
+    except Exception as e:
+        yield _sse_event("error", {"message": str(e)})
+
+
+async def _stream_sync(
+    card_client: Any,
+    embedding_generator: Any,
+    card_ids: List[int],
+    overwrite: bool,
+    concurrency: int,
+):
+    """/cards/sync?stream=true: 수집은 카드별, 임베딩은 청크별로 SSE 전송"""
+    fetch_counts = {"success": 0, "failed": 0, "skipped": 0}
+    embed_counts = {"success": 0, "failed": 0, "skipped": 0}
+    successful_ids: List[int] = []
+    preloaded: Dict[int, Dict[str, Any]] = {}
+    try:
+        async for card_id, status, item, card_data in _iter_fetch_cards(card_client, card_ids, overwrite, concurrency):
+            fetch_counts[status] += 1
+            if status == "success":
+                successful_ids.append(card_id)
+                preloaded[card_id] = card_data
+            yield _sse_event("card", {"stage": "fetch", "status": status, **item})
+        yield _sse_event("summary", {"stage": "fetch", "total_tried": len(card_ids), **fetch_counts})
+
+        if successful_ids:
+            async for chunk_results in _iter_embed_chunks(
+                embedding_generator, successful_ids, overwrite, preloaded=preloaded
+            ):
+                for key in embed_counts:
+                    embed_counts[key] += len(chunk_results[key])
+                yield _sse_event("embed", {"stage": "embed", **chunk_results})
+        yield _sse_event("summary", {"stage": "embed", **embed_counts})
+    except Exception as e:
+        yield _sse_event("error", {"message": str(e)})
 
 
 @router.post("/cards/fetch")
@@ -167,6 +381,8 @@ async def fetch_cards_from_cardgorilla(
     overwrite: bool = Query(False),
     start_id: int = Query(1),
     end_id: int = Query(5000),
+    concurrency: int = Query(DEFAULT_FETCH_CONCURRENCY, ge=1, le=64, description="동시 수집 요청 수"),
+    stream: bool = Query(False, description="True면 카드별 진행 상황을 SSE(text/event-stream)로 전송"),
     card_ids: Optional[List[int]] = Body(None),
 ):
     """
@@ -174,6 +390,7 @@ async def fetch_cards_from_cardgorilla(
 
     카드고릴라 API에서 카드 정보를 가져와 압축 컨텍스트 JSON 파일로 저장합니다.
     (data/cache/ctx/{card_id}.json)
+    stream=true면 결과 목록을 모으지 않고 카드별 이벤트와 마지막 summary 이벤트를 스트리밍합니다.
     """
     try:
         # card_ids가 없으면 범위 생성
@@ -182,7 +399,15 @@ async def fetch_cards_from_cardgorilla(
             print(f"📋 카드 ID 범위: {start_id}~{end_id} ({len(card_ids)}개)")
 
         card_client = getattr(request.app.state, "card_client", None)
-        results = await _fetch_cards_from_cardgorilla(card_client, card_ids, overwrite)
+        if stream:
+            if not card_client:
+                raise HTTPException(status_code=503, detail="카드 수집 서비스를 사용할 수 없습니다.")
+            return StreamingResponse(
+                _stream_fetch(card_client, card_ids, overwrite, concurrency),
+                media_type="text/event-stream",
+            )
+
+        results = await _fetch_cards_from_cardgorilla(card_client, card_ids, overwrite, concurrency)
         return {
             "success": True,
             "message": f"1단계 완료: 성공 {len(results['success'])}개, 실패 {len(results['failed'])}개, 건너뜀 {len(results['skipped'])}개",
@@ -252,6 +477,8 @@ async def sync_cards_batch(
     overwrite: bool = Query(False),
     start_id: int = Query(1),
     end_id: int = Query(5000),
+    concurrency: int = Query(DEFAULT_FETCH_CONCURRENCY, ge=1, le=64, description="동시 수집 요청 수"),
+    stream: bool = Query(False, description="True면 진행 상황을 SSE(text/event-stream)로 전송"),
     card_ids: Optional[List[int]] = Body(None),
 ):
     """통합: fetch + embed 한번에 실행"""
@@ -265,8 +492,15 @@ async def sync_cards_batch(
         if not all([card_client, embedding_generator]):
             raise HTTPException(status_code=503, detail="동기화 서비스를 사용할 수 없습니다.")
 
+        if stream:
+            return StreamingResponse(
+                _stream_sync(card_client, embedding_generator, card_ids, overwrite, concurrency),
+                media_type="text/event-stream",
+            )
+
         print("🔄 1/2 단계: 카드 데이터 수집")
-        fetch_results = await _fetch_cards_from_cardgorilla(card_client, card_ids, overwrite)
+        preloaded: Dict[int, Dict[str, Any]] = {}
+        fetch_results = await _fetch_cards_from_cardgorilla(card_client, card_ids, overwrite, concurrency, preloaded)
 
         successful_ids = [item["card_id"] for item in fetch_results["success"]]
         if not successful_ids:
@@ -278,7 +512,9 @@ async def sync_cards_batch(
             }
 
         print(f"🔄 2/2 단계: 임베딩 생성 ({len(successful_ids)}개)")
-        embed_results = await _embed_cards_to_mongodb(embedding_generator, successful_ids, overwrite)
+        embed_results = await _embed_cards_to_mongodb(
+            embedding_generator, successful_ids, overwrite, preloaded=preloaded
+        )
 
         return {
             "success": True,
@@ -304,11 +540,16 @@ async def sync_single_card(request: Request, card_id: int, overwrite: bool = Fal
         card_client = getattr(request.app.state, "card_client", None)
         embedding_generator = getattr(request.app.state, "embedding_generator", None)
 
-        fetch_results = await _fetch_cards_from_cardgorilla(card_client, [int(card_id)], overwrite)
+        preloaded: Dict[int, Dict[str, Any]] = {}
+        fetch_results = await _fetch_cards_from_cardgorilla(
+            card_client, [int(card_id)], overwrite, preloaded=preloaded
+        )
         if not fetch_results["success"]:
             raise HTTPException(status_code=404, detail="카드를 찾을 수 없거나 단종된 카드")
 
-        embed_results = await _embed_cards_to_mongodb(embedding_generator, [int(card_id)], overwrite)
+        embed_results = await _embed_cards_to_mongodb(
+            embedding_generator, [int(card_id)], overwrite, preloaded=preloaded
+        )
         return {
             "success": True,
             "card_id": card_id,
@@ -323,14 +564,36 @@ async def sync_single_card(request: Request, card_id: int, overwrite: bool = Fal
 
 
 @router.delete("/cards/reset")
-async def reset_vector_db():
-    """MongoDB 벡터 DB 초기화 (모든 임베딩 삭제)"""
+async def reset_vector_db(
+    request: Request,
+    mode: Literal["unset", "drop_index"] = Query(
+        "unset",
+        description="unset: 임베딩 필드 삭제(문서 재작성), drop_index: 벡터 검색 인덱스만 삭제(문서 유지)",
+    ),
+):
+    """MongoDB 벡터 DB 초기화 (모든 임베딩 삭제 또는 벡터 검색 인덱스 삭제)"""
     try:
-        from database.mongodb_client import MongoDBClient
+        mongo_client = _get_mongo_client(request)
+        collection = mongo_client.get_async_collection("cards")
+
+        if mode == "drop_index":
+            _invalidate_stats_cache()
+            # 문서를 건드리지 않는 카탈로그 작업: 벡터 검색만 즉시 비활성화됩니다.
+            # (재생성은 Atlas UI/API에서 card_vector_search 인덱스를 다시 만들면 됩니다)
+            await collection.drop_search_index(VECTOR_SEARCH_INDEX_NAME)
+            return {
+                "success": True,
+                "message": f"벡터 검색 인덱스 삭제 요청 완료: {VECTOR_SEARCH_INDEX_NAME}",
+                "modified_documents": 0,
+            }
 
-        mongo_client = MongoDBClient()
-        collection = mongo_client.get_collection("cards")
-        result = collection.update_many({}, {"$unset": {"embeddings": ""}, "$set": {"embeddings_count": 0}})
+        _invalidate_stats_cache()
+
+        # 임베딩이 있는 문서만 재작성 (빈 문서까지 전부 쓰지 않도록 필터)
+        result = await collection.update_many(
+            {"embeddings.0": {"$exists": True}},
+            {"$unset": {"embeddings": "", "doc_type_counts": ""}, "$set": {"embeddings_count": 0}},
+        )
         return {
             "success": True,
             "message": f"벡터 DB 초기화 완료: {result.modified_count}개 문서 수정",
@@ -344,44 +607,64 @@ async def reset_vector_db():
 
 
 @router.get("/vector-store/stats", response_model=AdminVectorStoreStatsResponse)
-async def admin_vector_store_stats():
+async def admin_vector_store_stats(request: Request):
     """벡터 스토어(임베딩) 통계 조회 (MongoDB 기반)"""
     try:
-        from database.mongodb_client import MongoDBClient
-
-        mongo_client = MongoDBClient()
-        collection = mongo_client.get_collection("cards")
-
-        total_docs = collection.count_documents({})
-        with_embeddings = collection.count_documents({"embeddings.0": {"$exists": True}})
+        mongo_client = _get_mongo_client(request)
+        collection = mongo_client.get_async_collection("cards")
+
+        async def compute() -> Dict[str, Any]:
+            total_docs = await collection.estimated_document_count()
+            with_embeddings = await collection.count_documents({"embeddings.0": {"$exists": True}})
+
+            doc_type_counts: Dict[str, int] = {}
+            try:
+                # 임베딩 저장 시 기록한 doc_type_counts를 합산하고,
+                # 해당 필드가 없는 과거 문서만 embeddings를 $unwind해서 집계합니다.
+                pipeline = [
+                    {"$match": {"embeddings.0": {"$exists": True}}},
+                    {
+                        "$facet": {
+                            "materialized": [
+                                {"$match": {"doc_type_counts": {"$type": "object"}}},
+                                {"$project": {"_id": 0, "kv": {"$objectToArray": "$doc_type_counts"}}},
+                                {"$unwind": "$kv"},
+                                {"$group": {"_id": "$kv.k", "count": {"$sum": "$kv.v"}}},
+                            ],
+                            "legacy": [
+                                {"$match": {"doc_type_counts": {"$not": {"$type": "object"}}}},
+                                {"$project": {"_id": 0, "embeddings.doc_type": 1}},
+                                {"$unwind": "$embeddings"},
+                                {"$group": {"_id": "$embeddings.doc_type", "count": {"$sum": 1}}},
+                            ],
+                        }
+                    },
+                ]
+                rows = await collection.aggregate(pipeline).to_list(length=1)
+                facet = rows[0] if rows else {}
+                for row in facet.get("materialized", []) + facet.get("legacy", []):
+                    key = str(row.get("_id") or "unknown")
+                    doc_type_counts[key] = doc_type_counts.get(key, 0) + int(row.get("count", 0))
+                doc_type_counts = dict(sorted(doc_type_counts.items(), key=lambda kv: kv[1], reverse=True))
+            except Exception as agg_error:
+                print(f"[WARN] doc_type 집계 실패(무시): {agg_error}")
 
-        doc_type_counts: Dict[str, int] = {}
-        try:
-            pipeline = [
-                {"$match": {"embeddings.0": {"$exists": True}}},
-                {"$unwind": "$embeddings"},
-                {"$group": {"_id": "$embeddings.doc_type", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-            ]
-            for row in collection.aggregate(pipeline):
-                key = row.get("_id") or "unknown"
-                doc_type_counts[str(key)] = int(row.get("count", 0))
-        except Exception as agg_error:
-            print(f"[WARN] doc_type 집계 실패(무시): {agg_error}")
+            return {
+                "database": mongo_client.db_name,
+                "collection": mongo_client.collection_name,
+                "total_documents": total_docs,
+                "documents_with_embeddings": with_embeddings,
+                "doc_type_counts": doc_type_counts,
+            }
 
-        return {
-            "database": mongo_client.db_name,
-            "collection": mongo_client.collection_name,
-            "total_documents": total_docs,
-            "documents_with_embeddings": with_embeddings,
-            "doc_type_counts": doc_type_counts,
-        }
+        return _etag_response(request, await _get_cached_stats("vector_store_stats", compute))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"벡터 스토어 통계 조회 실패: {str(e)}")
 
 
 @router.get("/vector-store/cards", response_model=AdminCardListResponseModel)
 async def admin_vector_store_cards(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     q: Optional[str] = Query(None, description="카드명/발급사/card_id 검색"),
@@ -389,10 +672,8 @@ async def admin_vector_store_cards(
 ):
     """임베딩이 저장된 카드 목록 조회"""
     try:
-        from database.mongodb_client import MongoDBClient
-
-        mongo_client = MongoDBClient()
-        collection = mongo_client.get_collection("cards")
+        mongo_client = _get_mongo_client(request)
+        collection = mongo_client.get_async_collection("cards")
 
         match: Dict[str, Any] = {}
         if with_embeddings_only:
@@ -411,30 +692,48 @@ async def admin_vector_store_cards(
                     pass
             match["$or"] = or_conditions
 
-        total = collection.count_documents(match)
-
+        # 전체 개수와 페이지 조회를 $facet으로 한 번의 왕복에서 처리
+        # ($sort는 $facet 앞에 두어야 admin_list_updated_card 인덱스를 탈 수 있습니다)
         pipeline = [
             {"$match": match},
-            {"$addFields": {"embeddings_count": {"$size": {"$ifNull": ["$embeddings", []]}}}},
+            {"$sort": {"updated_at": -1, "card_id": 1}},
             {
-                "$project": {
-                    "_id": 0,
-                    "card_id": 1,
-                    "meta": 1,
-                    "conditions": 1,
-                    "fees": 1,
-                    "hints": 1,
-                    "is_discon": 1,
-                    "updated_at": 1,
-                    "embeddings_count": 1,
+                "$facet": {
+                    "total": [{"$count": "n"}],
+                    "items": [
+                        {"$skip": int(skip)},
+                        {"$limit": int(limit)},
+                        {"$addFields": {"embeddings_count": {"$size": {"$ifNull": ["$embeddings", []]}}}},
+                        # 포함(inclusion) 전용 projection: embeddings/non_vector_docs/benefits_html 같은
+                        # 대용량 필드는 목록 응답에 실리지 않습니다.
+                        # hints는 목록 화면에 필요한 작은 키만, 검색용 대용량 리스트(search_*)는 제외합니다.
+                        {
+                            "$project": {
+                                "_id": 0,
+                                "card_id": 1,
+                                "meta.id": 1,
+                                "meta.corpCode": 1,
+                                "meta.name": 1,
+                                "meta.issuer": 1,
+                                "meta.type": 1,
+                                "conditions": 1,
+                                "fees": 1,
+                                "hints.top_tags": 1,
+                                "hints.brands": 1,
+                                "is_discon": 1,
+                                "updated_at": 1,
+                                "embeddings_count": 1,
+                            }
+                        },
+                    ],
                 }
             },
-            {"$sort": {"updated_at": -1, "card_id": 1}},
-            {"$skip": int(skip)},
-            {"$limit": int(limit)},
         ]
 
-        items = list(collection.aggregate(pipeline))
+        rows = await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=1)
+        doc = rows[0] if rows else {}
+        total = doc["total"][0]["n"] if doc.get("total") else 0
+        items = doc.get("items", [])
         return {"total": total, "skip": skip, "limit": limit, "items": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"카드 목록 조회 실패: {str(e)}")
@@ -442,36 +741,77 @@ async def admin_vector_store_cards(
 
 @router.get("/vector-store/cards/{card_id}", response_model=AdminCardDetailModel)
 async def admin_vector_store_card_detail(
+    request: Request,
     card_id: int,
     include_embedding: bool = Query(False, description="True면 embedding 벡터를 포함(매우 큼)"),
     text_limit: int = Query(600, ge=50, le=5000, description="청크 텍스트 미리보기 길이"),
 ):
     """특정 카드의 임베딩 청크 상세 조회"""
     try:
-        from database.mongodb_client import MongoDBClient
+        mongo_client = _get_mongo_client(request)
+        collection = mongo_client.get_async_collection("cards")
+
+        # 텍스트 자르기/embedding 제외를 서버(MongoDB)에서 처리해 전송량을 줄입니다.
+        # - include_embedding=False면 1536차원 벡터가 네트워크를 타지 않습니다.
+        chunk_fields: Dict[str, Any] = {
+            "doc_id": "$$e.doc_id",
+            "doc_type": "$$e.doc_type",
+            "metadata": "$$e.metadata",
+            "text": {
+                "$cond": [
+                    {"$eq": [{"$type": "$$e.text"}, "string"]},
+                    {
+                        "$cond": [
+                            {"$gt": [{"$strLenCP": "$$e.text"}, text_limit]},
+                            {"$concat": [{"$substrCP": ["$$e.text", 0, text_limit]}, "…"]},
+                            "$$e.text",
+                        ]
+                    },
+                    "$$e.text",
+                ]
+            },
+        }
+        if include_embedding:
+            chunk_fields["embedding"] = "$$e.embedding"
 
-        mongo_client = MongoDBClient()
-        collection = mongo_client.get_collection("cards")
+        pipeline = [
+            {"$match": {"card_id": card_id}},
+            {"$limit": 1},
+            {
+                "$project": {
+                    "_id": 0,
+                    "card_id": 1,
+                    "meta": 1,
+                    "conditions": 1,
+                    "fees": 1,
+                    "hints": 1,
+                    "is_discon": 1,
+                    "benefits_html": 1,
+                    "created_at": 1,
+                    "updated_at": 1,
+                    "embeddings": {
+                        "$map": {
+                            "input": {
+                                "$filter": {
+                                    "input": {"$ifNull": ["$embeddings", []]},
+                                    "as": "e",
+                                    "cond": {"$eq": [{"$type": "$$e"}, "object"]},
+                                }
+                            },
+                            "as": "e",
+                            "in": chunk_fields,
+                        }
+                    },
+                }
+            },
+            {"$addFields": {"embeddings_count": {"$size": "$embeddings"}}},
+        ]
 
-        doc = collection.find_one({"card_id": card_id}, {"_id": 0})
+        rows = await collection.aggregate(pipeline).to_list(length=1)
+        doc = rows[0] if rows else None
         if not doc:
             raise HTTPException(status_code=404, detail=f"카드를 찾을 수 없습니다. (card_id={card_id})")
 
-        embeddings = doc.get("embeddings") or []
-        sanitized = []
-        for item in embeddings:
-            if not isinstance(item, dict):
-                continue
-            out = dict(item)
-            text = out.get("text")
-            if isinstance(text, str) and len(text) > text_limit:
-                out["text"] = text[:text_limit] + "…"
-            if not include_embedding and "embedding" in out:
-                out.pop("embedding", None)
-            sanitized.append(out)
-
-        doc["embeddings"] = sanitized
-        doc["embeddings_count"] = len(sanitized)
         return doc
     except HTTPException:
         raise
@@ -491,7 +831,9 @@ async def admin_vector_store_query(request: Request, payload: AdminVectorQueryRe
         filters = {k: v for k, v in filters.items() if v is not None}
 
         internal_top_k = min(200, max(payload.top_k, payload.top_k * 5))
-        raw_results = vector_store.search_chunks(
+        # 쿼리 임베딩 + Atlas 검색은 동기 호출이므로 스레드에서 실행
+        raw_results = await asyncio.to_thread(
+            vector_store.search_chunks,
             query_text=payload.query_text.strip(),
             filters=filters,
             top_k=internal_top_k,
@@ -503,67 +845,60 @@ async def admin_vector_store_query(request: Request, payload: AdminVectorQueryRe
             if not allowed_doc_types:
                 allowed_doc_types = None
 
-        default_weights: Dict[str, float] = {
-            "summary": 1.15,
-            "benefit_core": 1.0,
-            "notes": 0.85,
-        }
-        weights = default_weights
+        weights = DEFAULT_DOC_TYPE_WEIGHTS
         if payload.doc_type_weights:
-            weights = {**default_weights, **{k: float(v) for k, v in payload.doc_type_weights.items()}}
+            weights = {**DEFAULT_DOC_TYPE_WEIGHTS, **{k: float(v) for k, v in payload.doc_type_weights.items()}}
 
-        query_text = payload.query_text.strip()
+        # 키워드 겹침은 explain 디버그에만 쓰이므로 그때만 계산합니다.
         keywords: List[str] = []
-        try:
-            import re
-
-            keywords = [
-                t
-                for t in re.findall(r"[0-9A-Za-z가-힣]{2,}", query_text)
-                if t not in {"전월", "실적", "할인", "적립"}
-            ]
-        except Exception:
-            keywords = []
-
-        processed = []
-        for r in raw_results:
-            meta = r.get("metadata") or {}
-            doc_type = str(meta.get("doc_type") or "")
-            if allowed_doc_types is not None and doc_type not in allowed_doc_types:
-                continue
-
-            raw_score = r.get("score")
-            if raw_score is None:
-                dist = float(r.get("distance", 1.0))
-                raw_score = 1.0 - dist
-            raw_score = float(raw_score)
-
-            w = float(weights.get(doc_type, 1.0))
-            adjusted_score = raw_score * w
-
-            text = r.get("text") or ""
-            overlap = 0
-            if keywords and isinstance(text, str) and text:
-                lower = text.lower()
-                overlap = sum(1 for k in keywords if k.lower() in lower)
-
+        keywords_lower: List[str] = []
+        if payload.explain:
+            query_text = payload.query_text.strip()
+            keywords = [t for t in _KEYWORD_RE.findall(query_text) if t not in _STOPWORDS]
+            # 소문자 변환은 키워드당 1회만 (결과마다 반복하지 않음)
+            keywords_lower = [kw.lower() for kw in keywords]
+
+        # 점수/가중치/doc_type 필터는 배열 연산으로 처리하고, top_k 생존자만 dict로 구성
+        n = len(raw_results)
+        raw_scores = np.fromiter(
+            (
+                float(r["score"]) if r.get("score") is not None else 1.0 - float(r.get("distance", 1.0))
+                for r in raw_results
+            ),
+            dtype=np.float64,
+            count=n,
+        )
+        doc_types = [str((r.get("metadata") or {}).get("doc_type") or "") for r in raw_results]
+        weight_arr = np.fromiter((float(weights.get(dt, 1.0)) for dt in doc_types), dtype=np.float64, count=n)
+        adjusted = raw_scores * weight_arr
+
+        candidates = np.arange(n)
+        if allowed_doc_types is not None and n:
+            candidates = np.flatnonzero(np.isin(np.array(doc_types), list(allowed_doc_types)))
+
+        k = min(payload.top_k, len(candidates))
+        if 0 < k < len(candidates):
+            candidates = candidates[np.argpartition(-adjusted[candidates], k - 1)[:k]]
+        top_idx = candidates[np.argsort(-adjusted[candidates], kind="stable")][:k]
+
+        results = []
+        for i in top_idx.tolist():
+            r = raw_results[i]
             out = dict(r)
             if payload.explain:
+                text = r.get("text") or ""
+                overlap = 0
+                if keywords_lower and isinstance(text, str) and text:
+                    lower = text.lower()
+                    overlap = sum(1 for kw in keywords_lower if kw in lower)
                 out["debug"] = {
-                    "raw_score": raw_score,
-                    "doc_type_weight": w,
-                    "adjusted_score": adjusted_score,
+                    "raw_score": float(raw_scores[i]),
+                    "doc_type_weight": float(weight_arr[i]),
+                    "adjusted_score": float(adjusted[i]),
                     "keyword_overlap": overlap,
                     "keywords": keywords[:10],
                 }
-            processed.append(out)
-
-        def sort_key(item: Dict[str, Any]) -> float:
-            dbg = item.get("debug") or {}
-            return float(dbg.get("adjusted_score", item.get("score", 0.0) or 0.0))
-
-        processed.sort(key=sort_key, reverse=True)
-        results = processed[: payload.top_k]
+            results.append(out)
 
         return {
             "query_text": payload.query_text,
@@ -5,177 +5,594 @@
 LLM이 카드 혜택 설명을 해석하고, 사용자 지출과 매칭하여 월/연 절약액을 산출합니다.
 """
 
-from utils import measure_time
+from utils import (
+    get_async_openai_client,
+    get_openai_rate_limiter,
+    load_env,
+    measure_time,
+    metrics_snapshot,
+    retry_openai,
+)
 import json
 import asyncio
+import functools
+import hashlib
+import inspect
+import re
 import sys
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
 from pathlib import Path
-from typing import Dict, List
-from openai import AsyncOpenAI
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import orjson
 import os
-from dotenv import load_dotenv
 project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 
-load_dotenv()
+# ===== 고정 프롬프트(prefix) =====
+# 카드마다 바뀌지 않는 system/규칙/스키마를 모듈 상수로 두고 항상 메시지 맨 앞에 배치합니다.
+# OpenAI 프롬프트 캐싱은 "동일한 prefix"에만 적용되므로, 배치 내 여러 카드 분석 시 prefill을 재사용합니다.
+PROMPT_CACHE_KEY = "benefit_analyzer_v3"
+
+STATIC_SYSTEM = (
+    "당신은 신용카드 혜택 분석 전문가입니다. "
+    "사용자의 소비 패턴/관심 카테고리와 카드 혜택을 매칭하여 적합성을 평가하고 절약액을 계산합니다."
+)
+
+STATIC_RULES = """다음 메시지의 [사용자 소비 패턴]과 [카드 혜택 정보]를 분석해 analyze_benefit 스키마의 JSON으로만 답하세요.
+규칙:
+1) 관심 카테고리에 혜택이 있으면 금액 정보가 없어도 긍정 평가
+2) 전월실적·최소결제·월 한도를 모두 반영
+3) 전월실적 정보가 없으면 관심 카테고리 정기 사용을 가정해 충족 여부 판단
+4) 전월실적 조건과 제외 항목은 항상 warnings에 기재
+5) 분량: reasoning ≤5줄(계산 근거), optimization_tips ≤3개, category_breakdown ≤5개(혜택 있는 것만), warnings ≤6개
+"""
+
+ANALYZE_BENEFIT_SCHEMA: Dict = {
+    "name": "analyze_benefit",
+    "description": "카드 혜택과 소비 패턴으로 절약액을 계산합니다.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "monthly_savings": {"type": "number", "description": "월 절약액(원)"},
+            "annual_savings": {"type": "number", "description": "연 절약액(원)"},
+            "conditions_met": {"type": "boolean", "description": "전월실적 등 조건 충족 여부"},
+            "warnings": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "주의사항(전월실적, 한도, 제외 항목 등)",
+            },
+            "category_breakdown": {
+                "type": "object",
+                "description": "카테고리별 월 절약액(원)",
+                "additionalProperties": {"type": "number"},
+            },
+            "optimization_tips": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "혜택 극대화 사용 팁",
+            },
+            "reasoning": {"type": "string", "description": "계산 근거"},
+        },
+        "required": ["monthly_savings", "annual_savings", "conditions_met", "warnings"],
+    },
+}
+
+# 강제 function call 대신 structured output으로 JSON 본문을 직접 받음 (tool 정의 토큰/래핑 오버헤드 제거)
+# category_breakdown(additionalProperties)과 선택 필드 때문에 strict 모드는 사용할 수 없음
+ANALYZE_BENEFIT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": ANALYZE_BENEFIT_SCHEMA["name"],
+        "schema": ANALYZE_BENEFIT_SCHEMA["parameters"],
+        "strict": False,
+    },
+}
+
+# 모델 캐스케이딩(선택 기능): 근거가 짧고 단순한 카드는 저렴한 모델로 먼저 분석하고, "혜택 없음" 판정이면 기본 모델로 재분석
+# 저가 모델의 잘못된 0 아닌 절약액은 걸러내지 못하므로 기본은 비활성화 (BENEFIT_CHEAP_MODEL=gpt-4o-mini 등으로 켬,
+# 환경변수는 load_env() 이후 생성자에서 읽음)
+CASCADE_MAX_TOKENS = 600
+CASCADE_MAX_CHUNKS = 2
+
+# 동시에 보낼 최대 LLM 요청 수 기본값 (RPM/TPM 한도에 맞춰 OPENAI_MAX_CONCURRENT 환경변수로 조정)
+DEFAULT_MAX_CONCURRENT = 16
+
+# cheap_model 인자를 생략했는지(환경변수 사용) 명시적 None(비활성화)인지 구분
+_UNSET: Any = object()
+
+# analyze_one 결과 캐시: (user_pattern, card_context)가 같으면 LLM을 다시 호출하지 않음
+ANALYSIS_CACHE_TTL_SECONDS = 7 * 24 * 3600
+ANALYSIS_CACHE_MAX_ENTRIES = 2048
+
+# 소비 패턴 요약 문자열 캐시 (같은 패턴으로 재요청/재생성 시 포맷팅 생략)
+USER_SUMMARY_CACHE_SIZE = 256
+
+# 카드 혜택 근거(evidence) 토큰 예산: 초과 시 우선순위 낮은 청크부터 제외
+MAX_EVIDENCE_TOKENS = 1500
+# doc_type별 기본 우선순위 (혜택 본문 > 조건/제외/요약 > 유의사항)
+EVIDENCE_DOC_TYPE_PRIORITY: Dict[str, int] = {
+    "benefit_core": 3,
+    "benefit_condition": 2,
+    "benefit_exclusion": 2,
+    "summary": 2,
+    "notes": 1,
+}
+
+# 스트리밍 중 순위 계산에 쓰이는 필드가 완성되는 즉시 뽑아내기 위한 패턴 (값 뒤에 , 또는 } 가 와야 완성)
+_PROGRESS_FIELD_RES: Dict[str, "re.Pattern[str]"] = {
+    field: re.compile(rf'"{field}"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}}]')
+    for field in ("monthly_savings", "annual_savings")
+}
+
+# 캐시/중복 제거 키용 정렬 직렬화 옵션 (dict 키 순서와 무관하게 같은 바이트 생성)
+_HASH_DUMPS_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _stable_hash(obj: Any) -> str:
+    raw = orjson.dumps(obj, option=_HASH_DUMPS_OPTIONS, default=str)
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+# 같은 doc_type 그룹 하나에 넣을 최대 글자 수 (최소 1개 청크는 항상 포함)
+MAX_EVIDENCE_CHARS_PER_DOC_TYPE = 4000
+_WHITESPACE_RE = re.compile(r"\s+")
+
+STATIC_MESSAGES = [
+    {"role": "system", "content": STATIC_SYSTEM},
+    {"role": "user", "content": STATIC_RULES},
+]
+
+
+@functools.lru_cache(maxsize=USER_SUMMARY_CACHE_SIZE)
+def _format_user_summary(amounts: Tuple[Tuple[str, int], ...], must_include: Tuple[str, ...]) -> str:
+    """
+    사용자 소비 요약 문자열 생성 (같은 소비 패턴이면 캐시된 문자열 재사용)
+
+    Args:
+        amounts: (카테고리, 월 금액) 튜플 (입력 순서 유지, 금액 > 0만)
+        must_include: 사용자가 관심있는 카테고리
+    """
+    parts: List[str] = []
+    if amounts:
+        parts.append("**구체적인 지출 금액:**\n" + "\n".join(f"{category}: {amount:,}원/월" for category, amount in amounts))
+    if must_include:
+        parts.append("**사용자가 관심있는 카테고리:**\n" + ", ".join(must_include))
+
+    return "\n\n".join(parts) if parts else "구체적인 소비 금액 정보 없음"
 
 
 class BenefitAnalyzer:
-    def __init__(self, model: str = "gpt-5-mini"):
+    def __init__(
+        self,
+        model: str = "gpt-5-mini",
+        max_concurrent: Optional[int] = None,
+        max_evidence_tokens: Optional[int] = MAX_EVIDENCE_TOKENS,
+        cheap_model: Optional[str] = _UNSET,
+    ):
+        load_env()
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY가 설정되어 있지 않습니다.")
-        self.client = AsyncOpenAI(api_key=api_key)
+        if max_concurrent is None:
+            max_concurrent = int(os.getenv("OPENAI_MAX_CONCURRENT", str(DEFAULT_MAX_CONCURRENT)))
+        if cheap_model is _UNSET:
+            cheap_model = os.getenv("BENEFIT_CHEAP_MODEL", "") or None
         self.model = model
+        self.cheap_model = cheap_model
+        self.max_evidence_tokens = max_evidence_tokens
+        # analyze_batch의 동시 요청 수 제한 (429 폭주 방지)
+        # asyncio.Semaphore는 처음 대기한 루프에 묶이므로 실행 중인 루프마다 따로 만듦 (get_async_openai_client와 동일)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._sems_lock = threading.Lock()
+        # 분석 결과 LRU 캐시 (key -> (저장 시각, card_id, 결과)) 및 card_id별 key 색인
+        self._cache: "OrderedDict[str, Tuple[float, Any, Dict]]" = OrderedDict()
+        self._cache_keys_by_card: Dict[Any, Set[str]] = {}
+        # 동기 호출용 전용 이벤트 루프 (호출마다 새 루프의 client/semaphore를 만들지 않도록 재사용)
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        # 모델 라우팅 누적 통계 (카드마다 출력하지 않고 analyze_batch 끝에 한 줄로 요약)
+        self.route_stats: Counter = Counter()
+
+    @property
+    def _sem(self) -> asyncio.Semaphore:
+        """현재 이벤트 루프 전용 동시 요청 제한 세마포어 (없으면 생성)"""
+        loop = asyncio.get_running_loop()
+        with self._sems_lock:
+            sem = self._sems.get(loop)
+            if sem is None:
+                sem = asyncio.Semaphore(self.max_concurrent)
+                self._sems[loop] = sem
+        return sem
+
+    @property
+    def client(self):
+        """현재 이벤트 루프의 공유 AsyncOpenAI 클라이언트 (인스턴스마다 커넥션 풀을 만들지 않음)"""
+        return get_async_openai_client()
 
     @staticmethod
     def _function_schema() -> Dict:
-        return {
-            "name": "analyze_benefit",
-            "description": "카드 혜택 설명과 사용자 소비 패턴을 분석하여 실제 절약 금액을 계산합니다.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "monthly_savings": {"type": "number", "description": "월 예상 절약액 (원)"},
-                    "annual_savings": {"type": "number", "description": "연 예상 절약액 (원)"},
-                    "conditions_met": {"type": "boolean", "description": "전월실적 등 조건 충족 여부"},
-                    "warnings": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "주의사항 (전월실적 미충족, 한도 초과, 제외 항목 등)",
-                    },
-                    "category_breakdown": {
-                        "type": "object",
-                        "description": "카테고리별 월 절약액 (원)",
-                        "additionalProperties": {"type": "number"},
-                    },
-                    "optimization_tips": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "혜택 최대화를 위한 사용 전략",
-                    },
-                    "reasoning": {"type": "string", "description": "계산 근거"},
-                },
-                "required": ["monthly_savings", "annual_savings", "conditions_met", "warnings"],
-            },
-        }
+        return ANALYZE_BENEFIT_SCHEMA
 
     @staticmethod
-    def _build_evidence_context(card_context: Dict) -> str:
-        parts: List[str] = []
-        for chunk in card_context.get("evidence_chunks", []):
+    def _estimate_tokens(text: str) -> int:
+        """토크나이저 없이 보수적으로 토큰 수 추정 (한글 1자≈1토큰, 영문/숫자 3자≈1토큰)"""
+        return len(text.encode("utf-8")) // 3 + 1
+
+    @staticmethod
+    def _user_keywords(user_pattern: Dict) -> Tuple[Set[str], List[str]]:
+        """사용자 관심 카테고리 집합과 텍스트 매칭용 키워드(카테고리/가맹점) 목록"""
+        spending = user_pattern.get("spending") or {}
+        must_include = (user_pattern.get("constraints") or {}).get("must_include_categories") or []
+
+        categories = {str(c) for c in spending} | {str(c) for c in must_include}
+        keywords = {c.lower() for c in categories}
+        for data in spending.values():
+            if isinstance(data, dict):
+                keywords.update(str(m).lower() for m in data.get("merchants") or [] if m)
+        return categories, [k for k in keywords if k]
+
+    def _select_evidence_chunks(self, user_pattern: Dict, card_context: Dict) -> List[Dict]:
+        """
+        토큰 예산 안에서 사용할 evidence 청크 선택
+
+        doc_type 우선순위 + 사용자 카테고리/가맹점 매칭 수로 점수를 매겨 높은 순으로 채우고,
+        선택된 청크는 원래 순서를 유지합니다. 최소 1개 청크는 항상 포함합니다.
+        """
+        chunks = [c for c in card_context.get("evidence_chunks", []) if (c.get("text") or "").strip()]
+        budget = self.max_evidence_tokens
+        if not budget or budget <= 0 or not chunks:
+            return chunks
+
+        costs = [self._estimate_tokens(c["text"]) for c in chunks]
+        if sum(costs) <= budget:
+            return chunks
+
+        categories, keywords = self._user_keywords(user_pattern)
+
+        def priority(i: int) -> int:
+            chunk = chunks[i]
+            meta = chunk.get("metadata") or {}
+            score = EVIDENCE_DOC_TYPE_PRIORITY.get(meta.get("doc_type", ""), 0)
+            if meta.get("category_std") in categories:
+                score += 2
+            lower = chunk["text"].lower()
+            return score + sum(1 for k in keywords if k in lower)
+
+        order = sorted(range(len(chunks)), key=lambda i: (-priority(i), i))
+        selected: Set[int] = set()
+        used = 0
+        for i in order:
+            if selected and used + costs[i] > budget:
+                continue
+            selected.add(i)
+            used += costs[i]
+        return [chunks[i] for i in sorted(selected)]
+
+    @staticmethod
+    def _build_evidence_context(card_context: Dict, chunks: Optional[List[Dict]] = None) -> str:
+        """
+        evidence 청크를 프롬프트 텍스트로 변환
+
+        공백/대소문자 정규화 후 같은 내용의 청크(슬라이딩 윈도우 중복 등)는 한 번만 넣고,
+        doc_type별로 묶어 헤더를 한 번만 붙입니다. 그룹 순서는 처음 등장한 순서를 따릅니다.
+        """
+        groups: Dict[str, List[str]] = {}
+        group_chars: Dict[str, int] = {}
+        seen: Set[int] = set()
+        for chunk in card_context.get("evidence_chunks", []) if chunks is None else chunks:
             text = (chunk.get("text") or "").strip()
             if not text:
                 continue
-            doc_type = (chunk.get("metadata", {}) or {}).get("doc_type", "")
-            header = f"[{doc_type}]\n" if doc_type else ""
-            parts.append(f"{header}{text}")
-        return "\n\n".join(parts).strip()
+            key = hash(_WHITESPACE_RE.sub(" ", text).lower())
+            if key in seen:
+                continue
+            seen.add(key)
+
+            doc_type = (chunk.get("metadata") or {}).get("doc_type", "")
+            texts = groups.setdefault(doc_type, [])
+            used = group_chars.get(doc_type, 0)
+            if texts and used + len(text) > MAX_EVIDENCE_CHARS_PER_DOC_TYPE:
+                continue
+            texts.append(text)
+            group_chars[doc_type] = used + len(text)
+
+        parts: List[str] = []
+        for doc_type, texts in groups.items():
+            body = "\n---\n".join(texts)
+            parts.append(f"[{doc_type}]\n{body}" if doc_type else body)
+        return "\n\n".join(parts)
 
     @staticmethod
     def _build_user_summary(user_pattern: Dict) -> str:
-        spending = user_pattern.get("spending", {}) or {}
-        constraints = user_pattern.get("constraints", {}) or {}
-        must_include = constraints.get("must_include_categories", []) or []
+        spending = user_pattern.get("spending") or {}
+        must_include = (user_pattern.get("constraints") or {}).get("must_include_categories") or []
 
-        lines: List[str] = []
+        # 금액 > 0인 (카테고리, 금액)만 키로 추려 문자열 생성은 캐시된 함수에 맡김
+        amounts: List[Tuple[str, int]] = []
         for category, data in spending.items():
             if isinstance(data, dict):
-                amount = float(data.get("amount", 0) or 0)
+                amount = float(data.get("amount") or 0)
+            elif isinstance(data, (int, float)):
+                amount = float(data)
             else:
-                amount = float(data or 0) if isinstance(
-                    data, (int, float)) else 0.0
+                continue
 
             if amount > 0:
-                lines.append(f"{category}: {int(amount):,}원/월")
+                amounts.append((category, int(amount)))
 
-        parts: List[str] = []
-        if lines:
-            parts.append("**구체적인 지출 금액:**\n" + "\n".join(lines))
-        if must_include:
-            parts.append("**사용자가 관심있는 카테고리:**\n" +
-                         ", ".join(map(str, must_include)))
-
-        return "\n\n".join(parts).strip() if parts else "구체적인 소비 금액 정보 없음"
-
-    @measure_time("analyze_one")
-    async def analyze_one(self, user_pattern: Dict, card_context: Dict) -> Dict:
-        evidence_context = self._build_evidence_context(card_context)
-        user_summary = self._build_user_summary(user_pattern)
+        return _format_user_summary(tuple(amounts), tuple(map(str, must_include)))
 
-        prompt = f"""다음은 사용자의 소비 패턴과 카드 혜택 정보입니다.
+    @staticmethod
+    def _cache_key(user_pattern: Dict, card_context: Dict) -> str:
+        return _stable_hash([user_pattern, card_context])
+
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        saved_at, card_id, result = entry
+        if time.monotonic() - saved_at > ANALYSIS_CACHE_TTL_SECONDS:
+            self._cache.pop(key, None)
+            self._unindex_cache_key(card_id, key)
+            return None
+        self._cache.move_to_end(key)
+        return dict(result)
+
+    def _cache_set(self, key: str, card_id: Any, result: Dict):
+        self._cache[key] = (time.monotonic(), card_id, dict(result))
+        self._cache.move_to_end(key)
+        self._cache_keys_by_card.setdefault(card_id, set()).add(key)
+        while len(self._cache) > ANALYSIS_CACHE_MAX_ENTRIES:
+            evicted_key, (_, evicted_card_id, _) = self._cache.popitem(last=False)
+            self._unindex_cache_key(evicted_card_id, evicted_key)
+
+    def _unindex_cache_key(self, card_id: Any, key: str):
+        """만료/축출된 key를 card_id 색인에서도 제거 (빈 집합은 삭제해 색인이 커지지 않도록)"""
+        keys = self._cache_keys_by_card.get(card_id)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._cache_keys_by_card[card_id]
+
+    def invalidate(self, card_id: Optional[Any] = None):
+        """
+        분석 결과 캐시 무효화
+
+        Args:
+            card_id: 해당 카드의 캐시만 삭제 (None이면 전체 삭제)
+        """
+        if card_id is None:
+            self._cache.clear()
+            self._cache_keys_by_card.clear()
+            return
+        for key in self._cache_keys_by_card.pop(card_id, set()):
+            self._cache.pop(key, None)
+
+    def _choose_model(self, evidence_context: str, chunk_count: int) -> str:
+        """근거 토큰 수/청크 수가 작은 쉬운 카드는 cheap_model, 나머지는 기본 모델"""
+        if (
+            self.cheap_model
+            and chunk_count <= CASCADE_MAX_CHUNKS
+            and self._estimate_tokens(evidence_context) < CASCADE_MAX_TOKENS
+        ):
+            return self.cheap_model
+        return self.model
 
-[사용자 소비 패턴]
+    @staticmethod
+    def _needs_escalation(result: Dict, card_context: Dict) -> bool:
+        """저가 모델이 '혜택 없음'으로 판단했지만 근거 청크가 여러 개면 기본 모델로 재확인"""
+        return (
+            not result.get("conditions_met")
+            and not result.get("monthly_savings")
+            and len(card_context.get("evidence_chunks") or []) > 1
+        )
+
+    def _build_request_body(
+        self,
+        user_pattern: Dict,
+        card_context: Dict,
+        model: Optional[str] = None,
+        user_summary: Optional[str] = None,
+    ) -> Dict:
+        """
+        chat.completions 요청 본문 구성 (analyze_one / Batch API 공용)
+
+        model을 생략하면 _choose_model로 근거 길이에 따라 모델을 고릅니다.
+        user_summary는 배치에서 한 번만 만든 문자열을 넘기면 재계산하지 않습니다.
+        """
+        chunks = self._select_evidence_chunks(user_pattern, card_context)
+        evidence_context = self._build_evidence_context(card_context, chunks)
+        if model is None:
+            model = self._choose_model(evidence_context, len(chunks))
+        if user_summary is None:
+            user_summary = self._build_user_summary(user_pattern)
+
+        # 카드별로 달라지는 부분(suffix)만 매 호출마다 구성
+        prompt = f"""[사용자 소비 패턴]
 {user_summary}
 
 [카드 혜택 정보]
 {evidence_context}
-
-위 정보를 바탕으로:
-1. 사용자가 관심있는 카테고리에 이 카드의 혜택이 있는지 확인하세요.
-2. 구체적인 금액이 없어도 관심 카테고리에 혜택이 있으면 긍정적으로 평가하세요.
-3. 전월실적 조건, 최소 구매금액, 월 한도 등 모든 조건을 고려하세요.
-4. 제외 항목이 있으면 warnings에 기록하세요.
-5. 계산 근거를 reasoning에 상세히 기록하세요.
-
-전월실적 조건 처리 규칙:
-- 사용자의 전월실적 정보가 명시적으로 제공되지 않은 경우, 일반적인 소비자 기준으로 충족 가능성을 판단하세요.
-- 관심 카테고리를 정기적으로 사용한다면 충족 가능성이 높다고 가정하세요.
-- 전월실적 조건이 있으면 항상 warnings에 조건을 명시하세요. 
-
-그외규칙
- - reasoning은 최대 5줄로 작성합니다.
- - optimization_tips는 최대 3개만 작성합니다.
- - category_breakdown은 혜택이 있는 카테고리만 포함하고 최대 5개로 제한합니다.
- - warnings는 최대 6개로 요약합니다.
 """
+        return {
+            "model": model,
+            "messages": [*STATIC_MESSAGES, {"role": "user", "content": prompt}],
+            "response_format": ANALYZE_BENEFIT_RESPONSE_FORMAT,
+        }
 
-        schema = self._function_schema()
-
+    async def analyze_one(
+        self,
+        user_pattern: Dict,
+        card_context: Dict,
+        on_progress: Optional[Callable[[Dict], Any]] = None,
+        user_summary: Optional[str] = None,
+    ) -> Dict:
+        """
+        카드 1장 혜택 분석
+
+        on_progress를 주면 stream=True로 받아 monthly_savings/annual_savings가 완성되는 즉시
+        {"card_id", 필드...} 부분 결과로 콜백을 호출합니다 (동기/비동기 함수 모두 가능).
+        캐시 히트면 전체 결과로 on_progress를 한 번 호출합니다.
+        반환값은 스트리밍 여부와 관계없이 전체 결과입니다.
+        """
+        cache_key = self._cache_key(user_pattern, card_context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            # 스트리밍 소비자가 캐시된 카드도 진행 이벤트를 받도록 전체 결과를 한 번 전달
+            if on_progress is not None:
+                ret = on_progress(dict(cached))
+                if inspect.isawaitable(ret):
+                    await ret
+            return cached
+
+        args = await self._analyze_uncached(user_pattern, card_context, on_progress, user_summary)
+        self._cache_set(cache_key, args["card_id"], args)
+        return args
+
+    @measure_time("analyze_one", verbose=False)
+    async def _analyze_uncached(
+        self,
+        user_pattern: Dict,
+        card_context: Dict,
+        on_progress: Optional[Callable[[Dict], Any]],
+        user_summary: Optional[str],
+    ) -> Dict:
+        """캐시 미스 경로 (LLM 호출) — 지연 샘플이 캐시 히트로 왜곡되지 않도록 여기서만 측정"""
+        card_id = card_context.get("card_id")
         try:
-            res = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "당신은 신용카드 혜택 분석 전문가입니다. "
-                            "사용자의 소비 패턴/관심 카테고리와 카드 혜택을 매칭하여 적합성을 평가하고 "
-                            "절약액을 계산합니다. 구체적인 금액이 없어도 카테고리 매칭이 좋으면 긍정적으로 평가합니다."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                tools=[{"type": "function", "function": schema}],
-                tool_choice={"type": "function",
-                             "function": {"name": "analyze_benefit"}}
-            )
-
-            msg = res.choices[0].message
-            if not msg.tool_calls:
-                raise ValueError("Function call이 반환되지 않았습니다.")
-
-            args = json.loads(msg.tool_calls[0].function.arguments)
-            args["card_id"] = card_context.get("card_id")
+            body = self._build_request_body(user_pattern, card_context, user_summary=user_summary)
+            args = await self._complete(body, card_id, on_progress)
+
+            if body["model"] != self.model:
+                self.route_stats[body["model"]] += 1
+                if self._needs_escalation(args, card_context):
+                    self.route_stats["escalated"] += 1
+                    body = self._build_request_body(
+                        user_pattern, card_context, model=self.model, user_summary=user_summary
+                    )
+                    args = await self._complete(body, card_id, on_progress)
+
+            args["card_id"] = card_id
             return args
 
         except Exception as e:
             raise ValueError(
                 f"혜택 분석 실패 (card_id={card_context.get('card_id')}): {e}") 
 
+    async def _complete(
+        self, body: Dict, card_id: Any, on_progress: Optional[Callable[[Dict], Any]]
+    ) -> Dict:
+        """요청 본문으로 completion을 받아 JSON 결과로 파싱"""
+        if on_progress is None:
+            res = await self._create_completion(
+                **body,
+                extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+            )
+            content = res.choices[0].message.content
+        else:
+            content = await self._stream_content(body, card_id, on_progress)
+
+        if not content:
+            raise ValueError("응답 본문이 비어 있습니다.")
+        return orjson.loads(content)
+
+    @retry_openai()
+    async def _create_completion(self, **kwargs):
+        """chat.completions 호출 (RPM/TPM 버킷 대기 후 요청, 429/연결 오류/5xx는 지수 백오프로 재시도)"""
+        return await get_openai_rate_limiter(kwargs.get("model")).chat_completion(self.client, **kwargs)
+
+    async def _stream_content(
+        self, body: Dict, card_id: Any, on_progress: Callable[[Dict], Any]
+    ) -> str:
+        """stream=True로 응답 본문을 모으면서 완성된 순위 필드를 on_progress로 먼저 전달"""
+        stream = await self._create_completion(
+            **body,
+            stream=True,
+            extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+        )
+
+        parts: List[str] = []
+        partial: Dict[str, Any] = {"card_id": card_id}
+        pending = dict(_PROGRESS_FIELD_RES)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if not pending:
+                continue
+
+            buffer = "".join(parts)
+            found = False
+            for field, pattern in list(pending.items()):
+                m = pattern.search(buffer)
+                if m:
+                    partial[field] = float(m.group(1))
+                    del pending[field]
+                    found = True
+            if found:
+                ret = on_progress(dict(partial))
+                if inspect.isawaitable(ret):
+                    await ret
+        return "".join(parts)
+
+    async def _analyze_guarded(
+        self,
+        user_pattern: Dict,
+        card_context: Dict,
+        on_progress: Optional[Callable[[Dict], Any]] = None,
+        user_summary: Optional[str] = None,
+    ) -> Dict:
+        async with self._sem:
+            return await self.analyze_one(user_pattern, card_context, on_progress, user_summary)
+
     @measure_time("analyze_batch")
-    async def analyze_batch(self, user_pattern: Dict, card_contexts: List[Dict]) -> List[Dict]:
+    async def analyze_batch(
+        self,
+        user_pattern: Dict,
+        card_contexts: List[Dict],
+        on_progress: Optional[Callable[[Dict], Any]] = None,
+    ) -> List[Dict]:
+        """
+        여러 카드 동시 분석 (입력 순서 유지, 실패한 카드는 절약액 0 결과로 대체)
+
+        on_progress를 주면 카드별 부분 결과(analyze_one 참고)를 도착하는 대로 전달합니다.
+        """
         if not card_contexts:
             return [] 
-        print(f"Analyzing {len(card_contexts)} cards")
-        tasks = [self.analyze_one(user_pattern, c) for c in card_contexts]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 같은 카드가 중복으로 들어오면(랭킹 동점, 다중 쿼리 등) LLM은 한 번만 호출하고 결과를 복사
+        unique: Dict[Any, Dict] = {}
+        order: List[Any] = []
+        for c in card_contexts:
+            key = self._dedup_key(c)
+            order.append(key)
+            unique.setdefault(key, c)
+
+        keys = list(unique)
+        # 사용자 요약은 모든 카드에 동일 → 한 번만 만들어 프롬프트 prefix 바이트도 동일하게 유지
+        user_summary = self._build_user_summary(user_pattern)
+        # route_stats는 누적값이므로 시작 시점 값을 빼서 이번 배치분만 요약
+        routes_before = Counter(self.route_stats)
+        tasks = [
+            self._analyze_guarded(user_pattern, unique[k], on_progress, user_summary) for k in keys
+        ]
+        results = dict(zip(keys, await asyncio.gather(*tasks, return_exceptions=True)))
+        self._print_batch_summary(
+            len(unique), len(card_contexts) - len(unique), self.route_stats - routes_before
+        )
 
         out: List[Dict] = []
-        for i, r in enumerate(results):
-            card_id = card_contexts[i].get("card_id", "unknown")
+        for key in order:
+            r = results[key]
+            card_id = unique[key].get("card_id", "unknown")
             if isinstance(r, Exception):
                 out.append(
                     {
@@ -188,9 +605,150 @@ class BenefitAnalyzer:
                     }
                 )
             else:
-                out.append(r)
+                out.append(dict(r))
         return out
 
+    @staticmethod
+    def _print_batch_summary(analyzed: int, duplicates: int, batch_routes: Counter):
+        """배치 단위 한 줄 요약 (LLM 호출 analyze_one 지연 p50/p95, 이번 배치의 모델 라우팅 통계)"""
+        stats = metrics_snapshot().get("analyze_one")
+        latency = f"p50={stats['p50_ms']:.0f}ms p95={stats['p95_ms']:.0f}ms" if stats else "-"
+        routes = ", ".join(f"{k}={v}" for k, v in batch_routes.items()) or "-"
+        print(
+            f"Analyzed {analyzed} cards ({duplicates} duplicates skipped) | "
+            f"analyze_one {latency} | route {routes}"
+        )
+
+    @staticmethod
+    def _dedup_key(card_context: Dict) -> Tuple[str, Any]:
+        """analyze_batch 중복 제거 키 (card_id가 없으면 컨텍스트 내용 해시)"""
+        card_id = card_context.get("card_id")
+        if card_id is not None:
+            return ("card_id", card_id)
+        return ("hash", _stable_hash(card_context))
+
+    def _run_sync(self, coro):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("이벤트 루프 안에서는 analyze_one/analyze_batch를 await로 호출하세요.")
+
+        if self._sync_loop is None or self._sync_loop.is_closed():
+            self._sync_loop = asyncio.new_event_loop()
+        return self._sync_loop.run_until_complete(coro)
+
+    def close(self):
+        """analyze_*_sync용 전용 이벤트 루프 정리 (동기 API를 다 쓴 뒤 호출, 이후 호출 시 새 루프 생성)"""
+        loop, self._sync_loop = self._sync_loop, None
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+    def __enter__(self) -> "BenefitAnalyzer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def analyze_sync(self, user_pattern: Dict, card_context: Dict) -> Dict:
+        """analyze_one의 동기 버전 (스크립트/배치 작업 등 이벤트 루프가 없는 곳에서 사용)"""
+        return self._run_sync(self.analyze_one(user_pattern, card_context))
+
+    def analyze_batch_sync(self, user_pattern: Dict, card_contexts: List[Dict]) -> List[Dict]:
+        """analyze_batch의 동기 버전 (카드별 요청은 내부에서 동시에 처리)"""
+        return self._run_sync(self.analyze_batch(user_pattern, card_contexts))
+
+    async def analyze_batch_offline(self, user_pattern: Dict, card_contexts: List[Dict]) -> str:
+        """
+        OpenAI Batch API로 혜택 분석 작업 제출 (지연 허용 오프라인 작업용)
+
+        실시간 API 대비 비용이 절반이고 RPM 한도를 소모하지 않습니다. 결과는 최대 24시간 내 생성됩니다.
+
+        Args:
+            user_pattern: 사용자 소비 패턴
+            card_contexts: 카드 컨텍스트 리스트
+
+        Returns:
+            batch_id (fetch_batch_results로 결과 조회, custom_id는 card_contexts 인덱스 문자열)
+        """
+        lines: List[bytes] = []
+        user_summary = self._build_user_summary(user_pattern)
+        # custom_id는 배치 안에서 고유해야 하므로 card_id가 아니라 입력 인덱스 사용 (중복 카드 충돌 방지)
+        for i, c in enumerate(card_contexts):
+            # 오프라인 배치는 결과를 보고 재분석(escalation)할 수 없으므로 cheap_model로 라우팅하지 않음
+            body = self._build_request_body(user_pattern, c, model=self.model, user_summary=user_summary)
+            body["prompt_cache_key"] = PROMPT_CACHE_KEY
+            lines.append(orjson.dumps(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": body,
+                }
+            ))
+
+        batch_file = await self.client.files.create(
+            file=("benefit_batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        print(f"Batch 제출 완료: batch_id={batch.id} ({len(lines)}개 카드)")
+        return batch.id
+
+    async def fetch_batch_results(
+        self,
+        batch_id: str,
+        poll_interval: float = 30.0,
+        card_contexts: Optional[List[Dict]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Batch 작업이 끝날 때까지 대기한 뒤 카드별 분석 결과 반환
+
+        Args:
+            batch_id: analyze_batch_offline이 반환한 ID
+            poll_interval: 상태 확인 간격 (초)
+            card_contexts: analyze_batch_offline에 넘긴 리스트 (주면 결과에 card_id를 채움)
+
+        Returns:
+            {custom_id(card_contexts 인덱스 문자열): analyze_one과 같은 형태의 결과}
+        """
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            await asyncio.sleep(poll_interval)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise ValueError(f"Batch 작업 실패 (batch_id={batch_id}, status={batch.status})")
+
+        content = await self.client.files.content(batch.output_file_id)
+        results: Dict[str, Dict] = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            custom_id = row.get("custom_id")
+            try:
+                message = row["response"]["body"]["choices"][0]["message"]
+                args = orjson.loads(message["content"])
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                print(f"⚠️  Batch 결과 파싱 실패 (custom_id={custom_id}): {e}")
+                continue
+            if card_contexts is not None and str(custom_id).isdigit() and int(custom_id) < len(card_contexts):
+                args["card_id"] = card_contexts[int(custom_id)].get("card_id")
+            results[custom_id] = args
+        return results
+
 
 # 사용 예시
 async def main():
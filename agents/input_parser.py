@@ -2,167 +2,325 @@
 자연어 입력 파서 Agent
 
 사용자의 자연어 입력을 구조화된 UserIntent로 변환합니다.
-LLM Function Calling을 사용하여 정확한 구조화를 수행합니다.
+LLM Structured Output(JSON Schema)을 사용하여 정확한 구조화를 수행합니다.
 """
 
+import asyncio
+import copy
+import hashlib
 import json
-from typing import Dict, Optional
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
 
-load_dotenv()
+from utils import get_async_openai_client, get_openai_rate_limiter, load_env, retry_openai
+from agents.semantic_cache import SemanticCache
 
 
-class InputParser:
-    """자연어 입력 파서"""
-    
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.model = "gpt-5-mini"
-    
-    def _get_function_schema(self) -> Dict:
-        """Function Calling 스키마 반환"""
-        return {
-            "name": "extract_spending_pattern",
-            "description": "사용자의 자연어 입력에서 소비 패턴, 선호사항, 제약 조건을 추출하여 구조화된 데이터로 변환합니다.",
-            "parameters": {
+# 출력 스키마/시스템 프롬프트는 호출마다 같으므로 모듈 상수로 한 번만 생성
+PARSER_SYSTEM_PROMPT = """당신은 사용자의 자연어 소비 패턴 입력을 구조화된 데이터로 변환하는 전문가입니다.
+
+**중요 규칙**:
+1. **spending 객체는 절대 비어있으면 안 됩니다**. 사용자가 언급한 모든 소비 카테고리를 반드시 포함하세요.
+2. 금액이 명시되지 않았어도 카테고리만 언급되면 spending에 추가하고 amount=0으로 설정하세요.
+3. 카테고리 매핑 예시:
+   - "스타벅스 자주 가" → cafe: {amount: 0, merchants: ["스타벅스"]}
+   - "쿠팡에서 장보거나 네이버 쇼핑" → online_shopping: {amount: 0, merchants: ["쿠팡", "네이버쇼핑"]}, grocery: {amount: 0, merchants: ["쿠팡"]}
+   - "해외여행" → travel: {amount: 0}
+   - "배달 자주 시켜먹어" → delivery: {amount: 0}
+4. 사용 가능한 카테고리: online_shopping, grocery, cafe, coffee, travel, delivery, digital_payment, convenience_store, dining, fuel, transportation, subscription_video, subscription_music 등
+5. spending이 비어있다면 must_include_categories를 참고하여 채워 넣으세요.
+6. '연회비 낮을수록 좋음'은 preferences에, '연회비 절대 2만원 이하'는 filters에 넣으세요."""
+
+EXTRACT_SPENDING_SCHEMA: Dict = {
+    "name": "extract_spending_pattern",
+    "description": "사용자의 자연어 입력에서 소비 패턴, 선호사항, 제약 조건을 추출하여 구조화된 데이터로 변환합니다.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "spending": {
                 "type": "object",
-                "properties": {
-                    "spending": {
-                        "type": "object",
-                        "description": "카테고리별 월 예상 지출 금액 (원 단위). **중요**: 사용자가 언급한 모든 소비 카테고리를 반드시 포함해야 함. 금액이 명시되지 않은 경우 amount를 0으로 설정. 예: '스타벅스 자주 가' -> cafe: {amount: 0, merchants: ['스타벅스']}, '쿠팡에서 장' -> online_shopping: {amount: 0, merchants: ['쿠팡']}",
-                        "minProperties": 1,
-                        "additionalProperties": {
-                            "type": "object",
-                            "properties": {
-                                "amount": {
-                                    "type": "number",
-                                    "description": "월 지출 금액 (원). 명시되지 않으면 0"
-                                },
-                                "merchants": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "주로 이용하는 가맹점/서비스 (예: 스타벅스, 넷플릭스)"
-                                },
-                                "payment_methods": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "주로 사용하는 결제 수단 (예: 네이버페이, 카카오페이)"
-                                },
-                                "notes": {
-                                    "type": "string",
-                                    "description": "추가 정보 (예: 주말에만 이용, 평일 점심 시간대)"
-                                }
-                            },
-                            "required": ["amount"]
+                "description": "카테고리별 월 예상 지출 금액 (원 단위). **중요**: 사용자가 언급한 모든 소비 카테고리를 반드시 포함해야 함. 금액이 명시되지 않은 경우 amount를 0으로 설정. 예: '스타벅스 자주 가' -> cafe: {amount: 0, merchants: ['스타벅스']}, '쿠팡에서 장' -> online_shopping: {amount: 0, merchants: ['쿠팡']}",
+                "minProperties": 1,
+                "additionalProperties": {
+                    "type": "object",
+                    "properties": {
+                        "amount": {
+                            "type": "number",
+                            "description": "월 지출 금액 (원). 명시되지 않으면 0"
+                        },
+                        "merchants": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "주로 이용하는 가맹점/서비스 (예: 스타벅스, 넷플릭스)"
+                        },
+                        "payment_methods": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "주로 사용하는 결제 수단 (예: 네이버페이, 카카오페이)"
+                        },
+                        "notes": {
+                            "type": "string",
+                            "description": "추가 정보 (예: 주말에만 이용, 평일 점심 시간대)"
                         }
                     },
-                    "subscriptions": {
+                    "required": ["amount"]
+                }
+            },
+            "subscriptions": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "구독 중인 서비스 목록 (예: 넷플릭스, 유튜브프리미엄, 쿠팡와우)"
+            },
+            "preferences": {
+                "type": "object",
+                "properties": {
+                    "card_count_preference": {
+                        "type": "string",
+                        "enum": ["1", "2", "3", "2-3"],
+                        "description": "원하는 카드 개수"
+                    },
+                    "max_annual_fee": {
+                        "type": "number",
+                        "description": "최대 연회비 (원)"
+                    },
+                    "prefer_types": {
                         "type": "array",
-                        "items": {"type": "string"},
-                        "description": "구독 중인 서비스 목록 (예: 넷플릭스, 유튜브프리미엄, 쿠팡와우)"
+                        "items": {
+                            "type": "string",
+                            "enum": ["credit", "debit", "both"]
+                        },
+                        "description": "선호하는 카드 유형"
                     },
-                    "preferences": {
-                        "type": "object",
-                        "properties": {
-                            "card_count_preference": {
-                                "type": "string",
-                                "enum": ["1", "2", "3", "2-3"],
-                                "description": "원하는 카드 개수"
-                            },
-                            "max_annual_fee": {
-                                "type": "number",
-                                "description": "최대 연회비 (원)"
-                            },
-                            "prefer_types": {
-                                "type": "array",
-                                "items": {
-                                    "type": "string",
-                                    "enum": ["credit", "debit", "both"]
-                                },
-                                "description": "선호하는 카드 유형"
-                            },
-                            "prefer_brands": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "선호하는 브랜드 (예: Visa, Mastercard)"
-                            },
-                            "exclude_banks": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "제외하고 싶은 발급사"
-                            },
-                            "only_online": {
-                                "type": "boolean",
-                                "description": "온라인 전용 카드만 원하는지 여부"
-                            }
-                        }
+                    "prefer_brands": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "선호하는 브랜드 (예: Visa, Mastercard)"
                     },
-                    "constraints": {
-                        "type": "object",
-                        "properties": {
-                            "pre_month_spending_estimate": {
-                                "type": "number",
-                                "description": "예상 전월 실적 (원)"
-                            },
-                            "must_include_categories": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "반드시 포함되어야 하는 카테고리"
-                            },
-                            "must_exclude_categories": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "제외해야 하는 카테고리"
-                            }
-                        }
+                    "exclude_banks": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "제외하고 싶은 발급사"
                     },
-                    "confidence": {
+                    "only_online": {
+                        "type": "boolean",
+                        "description": "온라인 전용 카드만 원하는지 여부"
+                    }
+                }
+            },
+            "constraints": {
+                "type": "object",
+                "properties": {
+                    "pre_month_spending_estimate": {
                         "type": "number",
-                        "description": "추출 신뢰도 (0-1)",
-                        "minimum": 0,
-                        "maximum": 1
+                        "description": "예상 전월 실적 (원)"
                     },
-                    "uncertainties": {
+                    "must_include_categories": {
                         "type": "array",
                         "items": {"type": "string"},
-                        "description": "불확실한 부분이나 모호한 정보"
+                        "description": "반드시 포함되어야 하는 카테고리"
                     },
-                    "query_text": {
+                    "must_exclude_categories": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "제외해야 하는 카테고리"
+                    }
+                }
+            },
+            "confidence": {
+                "type": "number",
+                "description": "추출 신뢰도 (0-1)",
+                "minimum": 0,
+                "maximum": 1
+            },
+            "uncertainties": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "불확실한 부분이나 모호한 정보"
+            },
+            "query_text": {
+                "type": "string",
+                "description": "벡터 검색용 자연어 요약 (예: '마트 30만원, OTT 구독, 간편결제 많이 사용, 연회비 2만원 이하, 체크카드 선호')"
+            },
+            "filters": {
+                "type": "object",
+                "properties": {
+                    "annual_fee_max": {
+                        "type": "number",
+                        "description": "최대 연회비 필터 (원)"
+                    },
+                    "pre_month_min_max": {
+                        "type": "number",
+                        "description": "최대 전월실적 조건 (원)"
+                    },
+                    "type": {
                         "type": "string",
-                        "description": "벡터 검색용 자연어 요약 (예: '마트 30만원, OTT 구독, 간편결제 많이 사용, 연회비 2만원 이하, 체크카드 선호')"
+                        "enum": ["credit", "debit", "both"],
+                        "description": "카드 유형 필터"
                     },
-                    "filters": {
-                        "type": "object",
-                        "properties": {
-                            "annual_fee_max": {
-                                "type": "number",
-                                "description": "최대 연회비 필터 (원)"
-                            },
-                            "pre_month_min_max": {
-                                "type": "number",
-                                "description": "최대 전월실적 조건 (원)"
-                            },
-                            "type": {
-                                "type": "string",
-                                "enum": ["credit", "debit", "both"],
-                                "description": "카드 유형 필터"
-                            },
-                            "only_online": {
-                                "type": "boolean",
-                                "description": "온라인 전용 필터"
-                            }
-                        }
+                    "only_online": {
+                        "type": "boolean",
+                        "description": "온라인 전용 필터"
                     }
-                },
-                "required": ["spending", "query_text", "filters"]
+                }
             }
-        }
+        },
+        "required": ["spending", "query_text", "filters"]
+    }
+}
+
+# 금액 문자열 파싱: "30만원", "1.5만", "100,000원", "3천 원", "5백원" 등 (단위는 표에서만 관리)
+_AMOUNT_UNITS = {"만": 10000, "천": 1000, "백": 100}
+_AMOUNT_RE = re.compile(
+    r"^\s*(\d[\d,]*(?:\.\d+)?)\s*([" + "".join(_AMOUNT_UNITS) + r"])?\s*원?\s*$"
+)
+
+# 강제 function call 대신 structured output으로 JSON 본문을 직접 받음
+# spending(additionalProperties)과 선택 필드 때문에 strict 모드는 사용할 수 없음
+EXTRACT_SPENDING_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": EXTRACT_SPENDING_SCHEMA["name"],
+        "schema": EXTRACT_SPENDING_SCHEMA["parameters"],
+        "strict": False,
+    },
+}
+
+# 프롬프트/스키마가 바뀌면 캐시 키도 바뀌도록 내용 해시를 버전으로 사용
+PARSER_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([PARSER_SYSTEM_PROMPT, EXTRACT_SPENDING_SCHEMA], ensure_ascii=False, sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+# 시스템 프롬프트/스키마는 매 호출 바이트 단위로 동일한 prefix → 같은 캐시 키로 묶어 OpenAI 프롬프트 캐시 적중률을 높임
+# (입력마다 바뀌는 내용은 user 메시지에만 둠)
+PARSER_PROMPT_CACHE_KEY = f"input_parser_{PARSER_PROMPT_VERSION}"
+
+# 같은 입력 재요청(개발/테스트, 사용자 재시도) 시 LLM 호출 생략
+PARSE_CACHE_MAX_ENTRIES = 1024
+PARSE_CACHE_TTL_SECONDS = 24 * 3600
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 의미 캐시: 표현만 다른 입력은 임베딩 유사도로 재사용 (미스마다 임베딩 호출이 추가되므로 기본 비활성화)
+# PARSER_SEMANTIC_CACHE 환경변수로 켜며, load_env() 이후 InputParser 생성 시점에 읽음
+SEMANTIC_CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# 배치 프롬프팅: 여러 입력을 번호를 붙여 한 번에 파싱 (시스템 프롬프트/왕복 비용을 N개가 나눠 부담)
+PARSE_BATCH_PROMPT_SIZE = 8
+PARSER_BATCH_SYSTEM_PROMPT = PARSER_SYSTEM_PROMPT + """
+
+**배치 입력**: 사용자 메시지에는 "1) ...", "2) ..."처럼 번호가 붙은 입력이 여러 개 있습니다.
+각 입력을 독립적으로 변환해 results 배열에 입력 번호 순서대로, 입력 개수와 같은 길이로 넣으세요."""
+EXTRACT_SPENDING_BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "extract_spending_pattern_batch",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {"type": "array", "items": EXTRACT_SPENDING_SCHEMA["parameters"]},
+            },
+            "required": ["results"],
+        },
+        "strict": False,
+    },
+}
+# 배치 요청은 시스템 프롬프트/응답 스키마(prefix)가 단건과 다르므로 별도 캐시 키로 라우팅
+# (같은 키에 서로 다른 prefix가 섞이면 같은 캐시 노드로 모여도 적중하지 않음)
+PARSER_BATCH_PROMPT_CACHE_KEY = f"input_parser_batch_{PARSER_PROMPT_VERSION}"
+
+
+class ParseCache:
+    """
+    InputParser.parse 결과 캐시
+
+    기본은 프로세스 내 LRU(OrderedDict)이며, get/set 메서드를 가진 외부 저장소(redis.Redis 등)를
+    backend로 주면 결과를 orjson으로 직렬화한 JSON 바이트로 그쪽에 저장합니다. 반환값은 항상 복사본입니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PARSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = PARSE_CACHE_TTL_SECONDS,
+        backend: Any = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(model: str, user_input: str) -> str:
+        normalized = _WHITESPACE_RE.sub(" ", user_input).strip().lower()
+        # 키 해시는 기존 backend 항목과 같은 키가 나오도록 stdlib json 직렬화를 그대로 유지
+        raw = json.dumps(
+            {"model": model, "prompt_v": PARSER_PROMPT_VERSION, "input": normalized},
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        if self.backend is not None:
+            raw = self.backend.get(key)
+            return orjson.loads(raw) if raw else None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        saved_at, value = entry
+        if time.monotonic() - saved_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict):
+        if self.backend is not None:
+            self.backend.set(key, orjson.dumps(value))
+            return
+
+        self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class InputParser:
+    """자연어 입력 파서"""
     
-    def parse(self, user_input: str) -> Dict:
+    def __init__(
+        self,
+        cache: Optional[ParseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+    ):
+        self.model = "gpt-5-mini"
+        # 파싱 결과 캐시 (테스트 등에서 다른 backend로 교체 가능)
+        self.cache = cache if cache is not None else ParseCache()
+        load_env()
+        semantic_cache_enabled = os.getenv("PARSER_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes")
+        if semantic_cache is None and semantic_cache_enabled:
+            semantic_cache = SemanticCache(namespace=f"{self.model}:{PARSER_PROMPT_VERSION}")
+        self.semantic_cache = semantic_cache
+        # parse_sync 전용 이벤트 루프 (AsyncOpenAI 연결이 한 루프에만 묶이도록 재사용)
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def openai_client(self):
+        """현재 이벤트 루프의 공유 AsyncOpenAI 클라이언트 (BenefitAnalyzer와 커넥션 풀 공유)"""
+        return get_async_openai_client()
+    
+    def _get_function_schema(self) -> Dict:
+        """출력 JSON 스키마 반환"""
+        return EXTRACT_SPENDING_SCHEMA
+    
+    async def parse(self, user_input: str) -> Dict:
         """
-        자연어 입력을 구조화된 UserIntent로 변환
+        자연어 입력을 구조화된 UserIntent로 변환 (비동기: 벡터 검색 등 다른 I/O와 겹쳐 실행 가능)
         
         Args:
             user_input: 사용자 자연어 입력
@@ -170,53 +328,227 @@ class InputParser:
         Returns:
             UserIntent Dict
         """
-        function_schema = self._get_function_schema()
-        
+        cache_key = self.cache.make_key(self.model, user_input)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        embedding = None
+        if self.semantic_cache is not None:
+            try:
+                embedding = await self._embed_input(user_input)
+                cached = self.semantic_cache.lookup(embedding, user_input)
+            except Exception as e:
+                # 의미 캐시는 최적화일 뿐이므로 실패해도 LLM 파싱으로 진행
+                print(f"⚠️  의미 캐시 조회 실패: {e}")
+                cached = None
+            if cached is not None:
+                self.cache.set(cache_key, cached)
+                return cached
+
         try:
-            response = self.openai_client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": """당신은 사용자의 자연어 소비 패턴 입력을 구조화된 데이터로 변환하는 전문가입니다.
-
-**중요 규칙**:
-1. **spending 객체는 절대 비어있으면 안 됩니다**. 사용자가 언급한 모든 소비 카테고리를 반드시 포함하세요.
-2. 금액이 명시되지 않았어도 카테고리만 언급되면 spending에 추가하고 amount=0으로 설정하세요.
-3. 카테고리 매핑 예시:
-   - "스타벅스 자주 가" → cafe: {amount: 0, merchants: ["스타벅스"]}
-   - "쿠팡에서 장보거나 네이버 쇼핑" → online_shopping: {amount: 0, merchants: ["쿠팡", "네이버쇼핑"]}, grocery: {amount: 0, merchants: ["쿠팡"]}
-   - "해외여행" → travel: {amount: 0}
-   - "배달 자주 시켜먹어" → delivery: {amount: 0}
-4. 사용 가능한 카테고리: online_shopping, grocery, cafe, coffee, travel, delivery, digital_payment, convenience_store, dining, fuel, transportation, subscription_video, subscription_music 등
-5. spending이 비어있다면 must_include_categories를 참고하여 채워 넣으세요.
-6. '연회비 낮을수록 좋음'은 preferences에, '연회비 절대 2만원 이하'는 filters에 넣으세요."""
+                        "content": PARSER_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
                         "content": user_input
                     }
                 ],
-                tools=[{
-                    "type": "function",
-                    "function": function_schema
-                }],
-                tool_choice={"type": "function", "function": {"name": "extract_spending_pattern"}},
-                temperature=1.0  # gpt-5-mini는 temperature=1만 지원
+                response_format=EXTRACT_SPENDING_RESPONSE_FORMAT,
+                temperature=1.0,  # gpt-5-mini는 temperature=1만 지원
+                extra_body={"prompt_cache_key": PARSER_PROMPT_CACHE_KEY},
             )
             
-            # Function call 결과 추출
+            # Structured output 결과 추출
             message = response.choices[0].message
-            if message.tool_calls and len(message.tool_calls) > 0:
-                tool_call = message.tool_calls[0]
-                arguments = json.loads(tool_call.function.arguments)
+            if message.content:
+                arguments = orjson.loads(message.content)
+                self.cache.set(cache_key, arguments)
+                if embedding is not None:
+                    await asyncio.to_thread(self.semantic_cache.add, embedding, user_input, arguments)
                 return arguments
             else:
-                raise ValueError("Function call이 반환되지 않았습니다")
+                raise ValueError("응답 본문이 비어 있습니다")
                 
         except Exception as e:
             raise ValueError(f"입력 파싱 실패: {e}")
     
+    def parse_sync(self, user_input: str) -> Dict:
+        """parse의 동기 버전 (이벤트 루프가 없는 스크립트 등에서 사용)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("이벤트 루프 안에서는 await parser.parse(...)를 사용하세요.")
+
+        if self._sync_loop is None or self._sync_loop.is_closed():
+            self._sync_loop = asyncio.new_event_loop()
+        return self._sync_loop.run_until_complete(self.parse(user_input))
+
+    async def parse_batch(
+        self, user_inputs: List[str], batch_size: int = PARSE_BATCH_PROMPT_SIZE
+    ) -> List[Dict]:
+        """
+        여러 입력을 배치 프롬프팅으로 파싱 (평가/회귀 테스트/일괄 재처리용)
+
+        캐시에 없는 입력만 batch_size개씩 번호를 붙여 한 요청으로 보내고, 묶음들은 동시에 처리합니다.
+        응답 개수가 입력 개수와 다르거나 묶음 요청이 실패하면 그 묶음은 parse로 하나씩 다시 처리합니다.
+
+        Args:
+            user_inputs: 사용자 자연어 입력 리스트
+            batch_size: 한 요청에 넣을 입력 수
+
+        Returns:
+            입력 순서와 같은 UserIntent Dict 리스트
+        """
+        results: List[Optional[Dict]] = [None] * len(user_inputs)
+        pending: List[int] = []
+        for i, user_input in enumerate(user_inputs):
+            cached = self.cache.get(self.cache.make_key(self.model, user_input))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        size = max(1, int(batch_size))
+        groups = [pending[i:i + size] for i in range(0, len(pending), size)]
+
+        async def run_group(indices: List[int]):
+            try:
+                parsed = await self._parse_group([user_inputs[i] for i in indices])
+            except Exception as e:
+                print(f"⚠️  배치 파싱 실패, 개별 파싱으로 전환 ({len(indices)}개): {e}")
+                parsed = await asyncio.gather(*(self.parse(user_inputs[i]) for i in indices))
+            for i, arguments in zip(indices, parsed):
+                results[i] = arguments
+
+        await asyncio.gather(*(run_group(g) for g in groups))
+        return results
+
+    async def _parse_group(self, user_inputs: List[str]) -> List[Dict]:
+        """번호 붙인 입력 묶음을 한 번의 요청으로 파싱 (결과 개수가 다르면 ValueError)"""
+        if len(user_inputs) == 1:
+            return [await self.parse(user_inputs[0])]
+
+        numbered = "\n".join(f"{n}) {text}" for n, text in enumerate(user_inputs, start=1))
+        response = await self._create_completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": PARSER_BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": numbered},
+            ],
+            response_format=EXTRACT_SPENDING_BATCH_RESPONSE_FORMAT,
+            temperature=1.0,  # gpt-5-mini는 temperature=1만 지원
+            extra_body={"prompt_cache_key": PARSER_BATCH_PROMPT_CACHE_KEY},
+        )
+        content = response.choices[0].message.content
+        if not content:
+            raise ValueError("응답 본문이 비어 있습니다")
+
+        parsed = orjson.loads(content).get("results") or []
+        if len(parsed) != len(user_inputs):
+            raise ValueError(f"결과 개수 불일치 (입력 {len(user_inputs)}개, 결과 {len(parsed)}개)")
+
+        for user_input, arguments in zip(user_inputs, parsed):
+            self.cache.set(self.cache.make_key(self.model, user_input), arguments)
+        return parsed
+
+    async def parse_batch_offline(self, user_inputs: List[str]) -> str:
+        """
+        OpenAI Batch API로 입력 파싱 작업 제출 (지연 허용 일괄 처리용, 비용 절반)
+
+        Args:
+            user_inputs: 사용자 자연어 입력 리스트
+
+        Returns:
+            batch_id (fetch_parse_batch_results로 결과 조회, custom_id는 입력 인덱스 문자열)
+        """
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [
+                            {"role": "system", "content": PARSER_SYSTEM_PROMPT},
+                            {"role": "user", "content": user_input},
+                        ],
+                        "response_format": EXTRACT_SPENDING_RESPONSE_FORMAT,
+                        "prompt_cache_key": PARSER_PROMPT_CACHE_KEY,
+                    },
+                },
+                ensure_ascii=False,
+            )
+            for i, user_input in enumerate(user_inputs)
+        ]
+
+        batch_file = await self.openai_client.files.create(
+            file=("parse_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        print(f"Batch 제출 완료: batch_id={batch.id} ({len(lines)}개 입력)")
+        return batch.id
+
+    async def fetch_parse_batch_results(self, batch_id: str, poll_interval: float = 30.0) -> Dict[str, Dict]:
+        """
+        Batch 작업이 끝날 때까지 대기한 뒤 입력별 파싱 결과 반환
+
+        Args:
+            batch_id: parse_batch_offline이 반환한 ID
+            poll_interval: 상태 확인 간격 (초)
+
+        Returns:
+            {custom_id(입력 인덱스 문자열): UserIntent Dict}
+        """
+        while True:
+            batch = await self.openai_client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            await asyncio.sleep(poll_interval)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise ValueError(f"Batch 작업 실패 (batch_id={batch_id}, status={batch.status})")
+
+        content = await self.openai_client.files.content(batch.output_file_id)
+        results: Dict[str, Dict] = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            custom_id = row.get("custom_id")
+            try:
+                message = row["response"]["body"]["choices"][0]["message"]
+                results[custom_id] = orjson.loads(message["content"])
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                print(f"⚠️  Batch 결과 파싱 실패 (custom_id={custom_id}): {e}")
+        return results
+
+    @retry_openai()
+    async def _embed_input(self, user_input: str):
+        """의미 캐시 조회용 입력 임베딩"""
+        response = await self.openai_client.embeddings.create(
+            model=SEMANTIC_CACHE_EMBEDDING_MODEL, input=user_input
+        )
+        return response.data[0].embedding
+
+    @retry_openai()
+    async def _create_completion(self, **kwargs):
+        """chat.completions 호출 (RPM/TPM 버킷 대기 후 요청, 429/연결 오류/5xx는 지수 백오프로 재시도)"""
+        return await get_openai_rate_limiter(kwargs.get("model")).chat_completion(self.openai_client, **kwargs)
+
     def _normalize_amount(self, amount_str: str) -> int:
         """
         금액 문자열을 숫자로 변환
@@ -227,20 +559,12 @@ class InputParser:
         Returns:
             금액 (원 단위)
         """
-        # 간단한 휴리스틱 (LLM이 이미 변환해주지만 백업용)
-        amount_str = amount_str.replace(",", "").replace("원", "").strip()
-        
-        if "만" in amount_str:
-            num = float(amount_str.replace("만", ""))
-            return int(num * 10000)
-        elif "천" in amount_str:
-            num = float(amount_str.replace("천", ""))
-            return int(num * 1000)
-        else:
-            try:
-                return int(float(amount_str))
-            except:
-                return 0
+        # 간단한 휴리스틱 (LLM이 이미 변환해주지만 백업용, 형식이 맞지 않으면 0)
+        m = _AMOUNT_RE.match(amount_str)
+        if not m:
+            return 0
+        num = float(m.group(1).replace(",", ""))
+        return int(num * _AMOUNT_UNITS.get(m.group(2), 1))
 
 
 # 사용 예시
@@ -250,7 +574,7 @@ def main():
     
     user_input = "마트 30만원, 넷플릭스/유튜브 구독, 간편결제 자주 씀. 연회비 2만원 이하, 체크카드 선호."
     
-    result = parser.parse(user_input)
+    result = parser.parse_sync(user_input)
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
 
@@ -5,8 +5,16 @@
 정량적 점수 계산과 타이브레이커를 통해 최적의 카드를 선정합니다.
 """
 
+import re
 from typing import Dict, List, Optional
-from data_collection.data_parser import load_compressed_context
+
+import numpy as np
+
+from data_collection.data_parser import load_compressed_contexts
+
+
+# 연회비 문자열의 첫 번째 금액 (예: "국내 15,000원 / 해외 18,000원" → 15,000)
+_ANNUAL_FEE_RE = re.compile(r'(\d{1,3}(?:,\d{3})*)')
 
 
 class Recommender:
@@ -36,16 +44,41 @@ class Recommender:
         if user_preferences is None:
             user_preferences = {}
         
+        # 후보 카드 메타데이터를 한 번에 로드 (캐시 미스만 MongoDB 쿼리 1회)
+        card_contexts = load_compressed_contexts(
+            [r["card_id"] for r in analysis_results if r.get("card_id")]
+        )
+
         # 각 카드에 대해 점수 계산
-        scored_cards = []
-        
-        for result in analysis_results:
+        # 정렬 키는 NumPy 배열(열 단위)로 모으고, 카드별 상세는 튜플로만 보관 → 당첨 카드만 Dict로 만듦
+        scores: List[float] = []
+        annual_fees: List[float] = []
+        prev_month_mins: List[float] = []
+        card_types: List[Optional[str]] = []
+        details: List[tuple] = []
+        input_order: List[int] = []
+        
+        # 분기 한정(branch-and-bound): 연회비·패널티는 0 이상이므로
+        # 점수 상한 = (조건 충족 시) 연 절약액 + 커버리지 보너스.
+        # 상한 높은 순으로 평가하다가 상한이 현재 최고 점수보다 작아지면 나머지는 이길 수 없으므로 중단
+        # (상한 == 최고 점수인 카드는 타이브레이커 후보라 계속 평가)
+        bounded = []
+        for input_index, result in enumerate(analysis_results):
+            savings_bound = (result.get("annual_savings", 0) or 0) if result.get("conditions_met", False) else 0
+            coverage_bound = sum(1 for v in result.get("category_breakdown", {}).values() if v > 0)
+            bounded.append((savings_bound + coverage_bound, input_index, result))
+        bounded.sort(key=lambda item: -item[0])
+        best_so_far = float("-inf")
+        
+        for upper_bound, input_index, result in bounded:
+            if upper_bound < best_so_far:
+                break
+            
             card_id = result.get("card_id")
             if not card_id:
                 continue
             
-            # 카드 메타데이터 로드
-            card_data = load_compressed_context(card_id)
+            card_data = card_contexts.get(card_id)
             if not card_data:
                 continue
             
@@ -69,81 +102,74 @@ class Recommender:
             
             # 커버리지 보너스 (카테고리별 절약액이 있는 카테고리 수)
             category_breakdown = result.get("category_breakdown", {})
-            coverage_bonus = len([v for v in category_breakdown.values() if v > 0])
+            coverage_bonus = sum(1 for v in category_breakdown.values() if v > 0)
             
             # 패널티
             penalties = 0
             
             # 경고가 많으면 패널티
             warnings = result.get("warnings", [])
-            if len(warnings) > 2:
+            n_warnings = len(warnings)
+            if n_warnings > 2:
                 penalties += 0.5
             
             # 최종 점수
             final_score = net_benefit + coverage_bonus - penalties
             
-            scored_cards.append({
-                "card_id": card_id,
-                "name": meta.get("name", ""),
-                "annual_savings": annual_savings,
-                "annual_fee": annual_fee,
-                "net_benefit": net_benefit,
-                "coverage_bonus": coverage_bonus,
-                "penalties": penalties,
-                "final_score": final_score,
-                "conditions_met": conditions_met,
-                "prev_month_min": conditions.get("prev_month_min", 0),
-                "warnings": warnings,
-                "category_breakdown": category_breakdown
-            })
-        
-        if not scored_cards:
+            best_so_far = max(best_so_far, final_score)
+            input_order.append(input_index)
+            scores.append(final_score)
+            annual_fees.append(annual_fee)
+            prev_month_mins.append(conditions.get("prev_month_min", 0) or 0)
+            card_types.append(meta.get("type"))
+            details.append((
+                card_id, meta.get("name", ""), annual_savings, annual_fee, net_benefit,
+                coverage_bonus, penalties, final_score, conditions_met, warnings, category_breakdown
+            ))
+        
+        if not details:
             raise ValueError("점수 계산 가능한 카드가 없습니다")
         
-        # 점수 순 정렬
-        scored_cards.sort(key=lambda x: x["final_score"], reverse=True)
-        
-        # 동점 처리 (타이브레이커)
-        top_score = scored_cards[0]["final_score"]
-        top_cards = [c for c in scored_cards if c["final_score"] == top_score]
-        
-        if len(top_cards) > 1:
-            # 타이브레이커 1: 연회비 낮은 순
-            top_cards.sort(key=lambda x: x["annual_fee"])
-            
-            # 타이브레이커 2: 전월실적 낮은 순
-            if len([c for c in top_cards if c["annual_fee"] == top_cards[0]["annual_fee"]]) > 1:
-                top_cards.sort(key=lambda x: x["prev_month_min"])
-            
-            # 타이브레이커 3: 사용자 선호도
-            if user_preferences:
-                prefer_types = user_preferences.get("prefer_types", [])
-                if prefer_types:
-                    type_map = {"credit": "C", "debit": "D"}
-                    for prefer_type in prefer_types:
-                        prefer_type_code = type_map.get(prefer_type)
-                        if prefer_type_code:
-                            preferred = [c for c in top_cards if self._get_card_type(c["card_id"]) == prefer_type_code]
-                            if preferred:
-                                top_cards = preferred
-                                break
-        
-        selected = top_cards[0]
+        # 사용자 선호 카드 유형 순위 (선호 목록 앞쪽일수록 작음, 목록에 없으면 맨 뒤)
+        prefer_types = user_preferences.get("prefer_types", []) or []
+        type_map = {"credit": "C", "debit": "D"}
+        type_rank: Dict[str, int] = {}
+        for rank, prefer_type in enumerate(prefer_types):
+            prefer_type_code = type_map.get(prefer_type)
+            if prefer_type_code and prefer_type_code not in type_rank:
+                type_rank[prefer_type_code] = rank
+        no_pref_rank = len(prefer_types)
+        
+        # 정렬 우선순위: 최종 점수 높은 순 → 선호 유형 → 연회비 낮은 순 → 전월실적 낮은 순 → 입력 순서
+        # (np.lexsort는 마지막 키가 1순위, 한 번의 정렬로 모든 타이브레이커 처리)
+        order = np.lexsort((
+            np.asarray(input_order),
+            np.asarray(prev_month_mins, dtype=np.float64),
+            np.asarray(annual_fees, dtype=np.float64),
+            np.asarray([type_rank.get(t, no_pref_rank) for t in card_types]),
+            -np.asarray(scores, dtype=np.float64),
+        ))
+        best = int(order[0])
+        
+        (
+            card_id, name, annual_savings, annual_fee, net_benefit,
+            coverage_bonus, penalties, final_score, conditions_met, warnings, category_breakdown
+        ) = details[best]
         
         return {
-            "selected_card": selected["card_id"],
-            "name": selected["name"],
+            "selected_card": card_id,
+            "name": name,
             "score_breakdown": {
-                "net_benefit": selected["net_benefit"],
-                "coverage_bonus": selected["coverage_bonus"],
-                "penalties": selected["penalties"],
-                "final_score": selected["final_score"]
+                "net_benefit": net_benefit,
+                "coverage_bonus": coverage_bonus,
+                "penalties": penalties,
+                "final_score": final_score
             },
-            "annual_savings": selected["annual_savings"],
-            "annual_fee": selected["annual_fee"],
-            "conditions_met": selected["conditions_met"],
-            "warnings": selected["warnings"],
-            "category_breakdown": selected["category_breakdown"]
+            "annual_savings": annual_savings,
+            "annual_fee": annual_fee,
+            "conditions_met": conditions_met,
+            "warnings": warnings,
+            "category_breakdown": category_breakdown
         }
     
     def _extract_annual_fee(self, fee_detail: str) -> int:
@@ -156,37 +182,12 @@ class Recommender:
         Returns:
             연회비 (원)
         """
-        import re
-        
         if not fee_detail:
             return 0
         
-        # 숫자 패턴 찾기
-        matches = re.findall(r'(\d{1,3}(?:,\d{3})*)', fee_detail)
-        if matches:
-            # 첫 번째 숫자 사용
-            fee_str = matches[0].replace(',', '')
-            try:
-                return int(fee_str)
-            except:
-                pass
-        
-        return 0
-    
-    def _get_card_type(self, card_id: int) -> Optional[str]:
-        """
-        카드 유형 조회
-        
-        Args:
-            card_id: 카드 ID
-        
-        Returns:
-            카드 유형 ("C", "D", "P" 등)
-        """
-        card_data = load_compressed_context(card_id)
-        if card_data:
-            return card_data.get("meta", {}).get("type")
-        return None
+        # 첫 번째 숫자만 사용하므로 findall 대신 search
+        m = _ANNUAL_FEE_RE.search(fee_detail)
+        return int(m.group(1).replace(',', '')) if m else 0
 
 
 # 사용 예시
@@ -4,15 +4,57 @@
 템플릿 기반으로 추천 결과를 사용자 친화적인 자연어로 변환합니다.
 """
 
-from typing import Dict, Optional, List
+import functools
+import heapq
+import operator
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping, Optional, List, Tuple
+
 from data_collection.data_parser import load_compressed_context
 
 
+# 섹션별 노출 카테고리 수
+REASON_TOP_K = 5
+STRATEGY_TOP_K = 3
+
+# (카테고리, 절약액) 튜플의 절약액 키 (C 구현 callable)
+_BY_SAVINGS = operator.itemgetter(1)
+
+# 추천 이유 한 줄 템플릿 (사용자 소비액 유무별, 예시는 suffix로 한 번에 채움)
+_REASON_WITH_USER = "- **{label}**에서 월 {user} 사용 시, 월 약 {save} 혜택을 받을 수 있습니다.{suffix}"
+_REASON_NO_USER = "- **{label}** 카테고리에서 월 약 {save} 혜택{suffix}"
+
+# 섹션 헤더/고정 문구 (매 호출 같은 문자열 객체 재사용)
+_REASON_HEADER = "### 추천 이유"
+_REASON_EMPTY = _REASON_HEADER + "\n이 카드는 다양한 소비 카테고리에서 골고루 혜택을 제공합니다."
+_STRATEGY_HEADER = "### 사용 전략"
+_STRATEGY_EMPTY = _STRATEGY_HEADER + "\n1. 일상 소비를 이 카드로 통합하여 사용하세요"
+# 카테고리별 절약액이 없을 때의 추천 이유 + 사용 전략 (섹션 구분자 포함, 한 번에 yield)
+_EMPTY_BREAKDOWN_SECTIONS = "\n\n" + _REASON_EMPTY + "\n\n" + _STRATEGY_EMPTY
+_WARN_HEADER = "### 주의사항"
+_WARN_NO_PREV_MONTH = "- 전월실적: 조건 없음 (사용 제한 없이 혜택 제공)"
+_WARN_TAX_EXCLUSION = "- 국세, 지방세, 공과금, 아파트관리비 등은 일반적으로 할인 제외"
+_SAVINGS_TEMPLATE = (
+    "### 예상 절약액\n"
+    "- 월 예상 혜택: 약 {monthly}\n"
+    "- 연 예상 혜택: 약 {annual}\n"
+    "- 연회비: {fee}\n"
+    "- **순 혜택(연회비 제외): 연 {net}**"
+)
+
+
 # ============================================
 # 카테고리 메타데이터
 # ============================================
 
-CATEGORY_METADATA = {
+_CAFE_INFO = {
+    "label": "카페",
+    "description": "커피전문점 및 음료 매장",
+    "strategy": "출퇴근 시 커피 구매로 매일 혜택 누리기",
+    "examples": "스타벅스, 이디야, 메가커피, 커피빈"
+}
+
+_CATEGORY_METADATA = {
     "digital_payment": {
         "label": "간편결제/페이",
         "description": "네이버페이, 카카오페이, 토스페이 등 간편결제 서비스",
@@ -25,18 +67,8 @@ CATEGORY_METADATA = {
         "strategy": "대형마트에서 주 1회 장보기 시 혜택 극대화",
         "examples": "이마트, 홈플러스, 롯데마트, 쿠팡"
     },
-    "cafe": {
-        "label": "카페",
-        "description": "커피전문점 및 음료 매장",
-        "strategy": "출퇴근 시 커피 구매로 매일 혜택 누리기",
-        "examples": "스타벅스, 이디야, 메가커피, 커피빈"
-    },
-    "coffee": {
-        "label": "카페",
-        "description": "커피전문점 및 음료 매장",
-        "strategy": "출퇴근 시 커피 구매로 매일 혜택 누리기",
-        "examples": "스타벅스, 이디야, 메가커피, 커피빈"
-    },
+    "cafe": _CAFE_INFO,
+    "coffee": _CAFE_INFO,  # cafe 별칭 (같은 객체 공유)
     "convenience_store": {
         "label": "편의점",
         "description": "GS25, CU, 세븐일레븐 등 편의점",
@@ -123,21 +155,46 @@ CATEGORY_METADATA = {
     }
 }
 
+# 읽기 전용으로 고정 (조회 결과를 호출자가 수정해도 공유 메타데이터가 바뀌지 않음)
+# 별칭 카테고리(cafe/coffee)는 같은 읽기 전용 객체를 가리키도록 원본 Dict 단위로 감쌈
+_frozen_infos: Dict[int, Mapping[str, str]] = {}
+CATEGORY_METADATA: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    category: _frozen_infos.setdefault(id(info), MappingProxyType(info))
+    for category, info in _CATEGORY_METADATA.items()
+})
+del _frozen_infos
+
+_DEFAULT_CATEGORY_STRATEGY = "이 카테고리를 자주 사용하면 혜택을 받을 수 있습니다"
+
+
+@functools.lru_cache(maxsize=256)
+def _default_category_info(category: str) -> Mapping[str, str]:
+    """미등록 카테고리용 기본 메타데이터 (카테고리별로 한 번만 생성)"""
+    return MappingProxyType({
+        "label": category,
+        "description": "",
+        "strategy": _DEFAULT_CATEGORY_STRATEGY,
+        "examples": ""
+    })
+
 
 class ResponseGenerator:
     """템플릿 기반 응답 생성 Agent"""
 
+    # 인스턴스 상태가 없으므로 __dict__도 만들지 않음
+    __slots__ = ()
+
     def __init__(self):
         """초기화 - 템플릿 기반이므로 외부 의존성 없음"""
-        pass
 
     def generate(
         self,
         recommendation_result: Dict,
-        user_pattern: Optional[Dict] = None
+        user_pattern: Optional[Dict] = None,
+        card_data: Optional[Dict] = None
     ) -> str:
         """
-        템플릿 기반 추천 응답 생성
+        템플릿 기반 추천 응답 생성 (LLM 호출 없음, 같은 입력이면 같은 출력)
 
         Args:
             recommendation_result: 추천 결과 Dict
@@ -149,61 +206,97 @@ class ResponseGenerator:
                 - warnings: 주의사항 리스트
             user_pattern: 사용자 소비 패턴 (선택적)
                 - spending: 카테고리별 소비액
+            card_data: 선택 카드의 압축 컨텍스트 (호출자가 이미 로드했다면 전달해 재조회 생략)
 
         Returns:
             자연어 추천 텍스트
         """
+        _card_id, card_data, error = self._resolve_card(recommendation_result, card_data)
+        if error:
+            return error
+        return "".join(self._iter_sections(recommendation_result, user_pattern, card_data))
+
+    def _resolve_card(
+        self,
+        recommendation_result: Dict,
+        card_data: Optional[Dict]
+    ) -> Tuple[Optional[int], Optional[Dict], Optional[str]]:
+        """선택 카드 ID 검증 및 카드 데이터 로드 → (card_id, card_data, 오류 메시지)"""
         # 1. 카드 ID 검증
         card_id = recommendation_result.get("selected_card")
         if not card_id:
-            return "추천할 카드를 찾을 수 없습니다."
+            return None, None, "추천할 카드를 찾을 수 없습니다."
 
-        # 2. 카드 데이터 로드
-        card_data = load_compressed_context(card_id)
+        # 2. 카드 데이터 로드 (전달받지 않은 경우만)
+        if card_data is None:
+            card_data = load_compressed_context(card_id)
         if not card_data:
-            return f"카드 정보를 불러올 수 없습니다 (card_id={card_id})"
+            return card_id, None, f"카드 정보를 불러올 수 없습니다 (card_id={card_id})"
+        return card_id, card_data, None
 
+    def _iter_sections(
+        self,
+        recommendation_result: Dict,
+        user_pattern: Optional[Dict],
+        card_data: Dict
+    ) -> Iterator[str]:
+        """5개 섹션을 순서대로 생성 (섹션 사이 구분자 포함)"""
         # 3. 메타데이터 추출
         meta = card_data.get("meta", {})
         conditions = card_data.get("conditions", {})
-        category_breakdown = recommendation_result.get("category_breakdown", {})
+        # 절약액 0인 카테고리는 "월 약 0원 혜택" 같은 빈 문장만 늘리므로 제외
+        category_breakdown = {
+            category: amount
+            for category, amount in (recommendation_result.get("category_breakdown") or {}).items()
+            if isinstance(amount, (int, float)) and amount > 0
+        }
         warnings = recommendation_result.get("warnings", [])
 
-        # 4. 5개 섹션 생성
-        header = self._generate_header(
+        # 4. 5개 섹션 생성 및 조합
+        yield self._generate_header(
             meta.get("name", "추천 카드"),
             meta.get("issuer", "")
         )
 
-        reason = self._generate_recommendation_reason(
-            category_breakdown,
-            user_pattern
-        )
+        if not category_breakdown:
+            # 절약액 정보가 없으면 고정 문구 → 두 섹션 함수 호출/리스트 생성 생략
+            yield _EMPTY_BREAKDOWN_SECTIONS
+        else:
+            # 절약액 순위는 한 번만 계산 (추천 이유는 상위 5개, 사용 전략은 그중 앞 3개)
+            ranked = heapq.nlargest(
+                max(REASON_TOP_K, STRATEGY_TOP_K), category_breakdown.items(), key=_BY_SAVINGS
+            )
 
-        strategy = self._generate_usage_strategy(category_breakdown)
+            yield "\n\n" + self._generate_recommendation_reason(
+                ranked,
+                user_pattern
+            )
 
-        warning = self._generate_warnings(
+            yield "\n\n" + self._generate_usage_strategy(ranked)
+
+        yield "\n\n" + self._generate_warnings(
             warnings,
             conditions.get("prev_month_min", 0),
             conditions.get("benefit_cap")
         )
 
-        savings = self._generate_savings_summary(
+        yield "\n\n" + self._generate_savings_summary(
             recommendation_result.get("annual_savings", 0),
             recommendation_result.get("annual_fee", 0),
             recommendation_result.get("score_breakdown", {}).get("net_benefit", 0)
         )
 
-        # 5. 섹션 조합
-        return "\n\n".join([header, reason, strategy, warning, savings])
-
     # ============================================
     # 유틸리티 함수
     # ============================================
 
-    def _format_currency(self, amount: int) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024, typed=True)
+    def _format_currency(amount: int) -> str:
         """
-        금액을 천 단위 콤마로 포맷
+        금액을 천 단위 콤마로 포맷 (순수 함수라 자주 나오는 금액은 캐시된 문자열 재사용)
+
+        typed=True: 1000과 1000.0은 출력이 달라("1,000원" / "1,000.0원") 따로 캐시
 
         Args:
             amount: 금액 (원)
@@ -215,7 +308,7 @@ class ResponseGenerator:
             return "없음"
         return f"{amount:,}원"
 
-    def _get_category_info(self, category: str) -> Dict:
+    def _get_category_info(self, category: str) -> Mapping[str, str]:
         """
         카테고리 메타데이터 조회
 
@@ -225,12 +318,11 @@ class ResponseGenerator:
         Returns:
             카테고리 메타데이터 (label, description, strategy, examples)
         """
-        return CATEGORY_METADATA.get(category, {
-            "label": category,
-            "description": "",
-            "strategy": "이 카테고리를 자주 사용하면 혜택을 받을 수 있습니다",
-            "examples": ""
-        })
+        # 등록된 카테고리는 모듈 상수를 그대로, 미등록 카테고리는 캐시된 기본값 반환 (호출마다 할당 없음)
+        info = CATEGORY_METADATA.get(category)
+        if info is not None:
+            return info
+        return _default_category_info(category)
 
     # ============================================
     # 섹션 생성 함수
@@ -253,32 +345,26 @@ class ResponseGenerator:
 
     def _generate_recommendation_reason(
         self,
-        category_breakdown: Dict[str, int],
+        ranked: List[Tuple[str, int]],
         user_pattern: Optional[Dict]
     ) -> str:
         """
         추천 이유 섹션 생성
 
         Args:
-            category_breakdown: 카테고리별 월 절약액
+            ranked: 절약액 내림차순 (카테고리, 월 절약액) 리스트
             user_pattern: 사용자 소비 패턴
 
         Returns:
             추천 이유 텍스트
         """
-        if not category_breakdown:
-            return "### 추천 이유\n이 카드는 다양한 소비 카테고리에서 골고루 혜택을 제공합니다."
+        if not ranked:
+            return _REASON_EMPTY
 
-        lines = ["### 추천 이유"]
+        lines = [_REASON_HEADER]
 
-        # 절약액 순으로 정렬 (상위 5개만)
-        sorted_categories = sorted(
-            category_breakdown.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
-
-        for category, monthly_savings in sorted_categories:
+        # 절약액 상위 5개만 사용
+        for category, monthly_savings in ranked[:REASON_TOP_K]:
             cat_info = self._get_category_info(category)
 
             # 사용자 소비액 확인
@@ -288,44 +374,42 @@ class ResponseGenerator:
                 if category in spending:
                     user_amount = spending[category].get("amount", 0)
 
-            # 문장 생성
+            # 문장 생성 (예시가 있으면 괄호로 덧붙임)
+            examples = cat_info.get("examples")
+            suffix = f" ({examples})" if examples else ""
             if user_amount and user_amount > 0:
-                line = f"- **{cat_info['label']}**에서 월 {self._format_currency(user_amount)} 사용 시, "
-                line += f"월 약 {self._format_currency(monthly_savings)} 혜택을 받을 수 있습니다."
+                lines.append(_REASON_WITH_USER.format(
+                    label=cat_info["label"],
+                    user=self._format_currency(user_amount),
+                    save=self._format_currency(monthly_savings),
+                    suffix=suffix,
+                ))
             else:
-                line = f"- **{cat_info['label']}** 카테고리에서 월 약 {self._format_currency(monthly_savings)} 혜택"
-
-            # 예시 추가
-            if cat_info.get("examples"):
-                line += f" ({cat_info['examples']})"
-
-            lines.append(line)
+                lines.append(_REASON_NO_USER.format(
+                    label=cat_info["label"],
+                    save=self._format_currency(monthly_savings),
+                    suffix=suffix,
+                ))
 
         return "\n".join(lines)
 
-    def _generate_usage_strategy(self, category_breakdown: Dict[str, int]) -> str:
+    def _generate_usage_strategy(self, ranked: List[Tuple[str, int]]) -> str:
         """
         사용 전략 섹션 생성
 
         Args:
-            category_breakdown: 카테고리별 월 절약액
+            ranked: 절약액 내림차순 (카테고리, 월 절약액) 리스트
 
         Returns:
             사용 전략 텍스트
         """
-        if not category_breakdown:
-            return "### 사용 전략\n1. 일상 소비를 이 카드로 통합하여 사용하세요"
+        if not ranked:
+            return _STRATEGY_EMPTY
 
-        lines = ["### 사용 전략"]
+        lines = [_STRATEGY_HEADER]
 
         # 상위 3개 카테고리 선택
-        top_categories = sorted(
-            category_breakdown.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:3]
-
-        for i, (category, _) in enumerate(top_categories, 1):
+        for i, (category, _) in enumerate(ranked[:STRATEGY_TOP_K], 1):
             cat_info = self._get_category_info(category)
             strategy = cat_info.get("strategy", "이 카테고리를 자주 사용하세요")
             lines.append(f"{i}. {strategy}")
@@ -349,7 +433,7 @@ class ResponseGenerator:
         Returns:
             주의사항 텍스트
         """
-        lines = ["### 주의사항"]
+        lines = [_WARN_HEADER]
 
         # 분석기가 제공한 경고
         for warning in warnings:
@@ -359,14 +443,14 @@ class ResponseGenerator:
         if prev_month_min > 0:
             lines.append(f"- 전월실적: {self._format_currency(prev_month_min)} 이상 사용 필요")
         else:
-            lines.append("- 전월실적: 조건 없음 (사용 제한 없이 혜택 제공)")
+            lines.append(_WARN_NO_PREV_MONTH)
 
         # 혜택 한도
         if benefit_cap and benefit_cap > 0:
             lines.append(f"- 통합할인한도: 월 {self._format_currency(benefit_cap)}")
 
         # 공통 제외 항목
-        lines.append("- 국세, 지방세, 공과금, 아파트관리비 등은 일반적으로 할인 제외")
+        lines.append(_WARN_TAX_EXCLUSION)
 
         return "\n".join(lines)
 
@@ -389,15 +473,12 @@ class ResponseGenerator:
         """
         monthly_savings = annual_savings // 12 if annual_savings > 0 else 0
 
-        lines = [
-            "### 예상 절약액",
-            f"- 월 예상 혜택: 약 {self._format_currency(monthly_savings)}",
-            f"- 연 예상 혜택: 약 {self._format_currency(annual_savings)}",
-            f"- 연회비: {self._format_currency(annual_fee)}",
-            f"- **순 혜택(연회비 제외): 연 {self._format_currency(net_benefit)}**"
-        ]
-
-        return "\n".join(lines)
+        return _SAVINGS_TEMPLATE.format(
+            monthly=self._format_currency(monthly_savings),
+            annual=self._format_currency(annual_savings),
+            fee=self._format_currency(annual_fee),
+            net=self._format_currency(net_benefit),
+        )
 
 
 # 사용 예시
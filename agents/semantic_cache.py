@@ -0,0 +1,218 @@
+"""
+의미 기반(semantic) 입력 캐시
+
+"스타벅스 자주 가" / "스벅 많이 감"처럼 표현만 다른 입력은 정확 일치 캐시에 걸리지 않으므로,
+입력 임베딩의 코사인 유사도가 임계값 이상이면 이전 파싱 결과를 재사용합니다.
+임베딩 행렬은 NumPy로 메모리에 두고, 행은 SQLite에 저장해 재시작 후에도 유지합니다.
+
+주의: 임베딩은 "스타벅스 5만원" / "이마트 5만원"처럼 가맹점만 다른 입력도 매우 가깝게 봅니다.
+그래서 숫자와 가맹점 토큰을 따로 비교하고 임계값을 높게 두지만, 가맹점명이 없는 카테고리 표현
+("카페 자주 가" / "편의점 자주 가")이나 원문에 없는 정규화 이름("스벅" → 스타벅스)은
+임계값에만 의존하므로 오탐 가능성이 남아 있습니다 (그래서 의미 캐시는 기본 비활성화).
+"""
+
+import copy
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SEMANTIC_CACHE_DB_PATH = str(PROJECT_ROOT / "data/cache/semantic_cache.sqlite3")
+# 다른 카테고리 입력을 재사용하면 잘못된 추천으로 이어지므로 보수적으로 높게 설정
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_MAX_ENTRIES = 10_000
+
+# 금액/숫자가 다르면 유사도가 높아도 다른 입력으로 취급 ("마트 30만원" vs "마트 50만원")
+_NUMBER_RE = re.compile(r"\d[\d,.]*\s*[만천]?")
+
+
+def _number_signature(text: str) -> Tuple[str, ...]:
+    return tuple(sorted(re.sub(r"[\s,]", "", m) for m in _NUMBER_RE.findall(text)))
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+# 가맹점이 다르면 유사도가 높아도 다른 입력으로 취급 ("스타벅스 5만원" vs "이마트 5만원")
+def _merchant_signature(value: Dict, user_input: str) -> Tuple[Tuple[str, bool], ...]:
+    """파싱 결과의 가맹점별로 원문에 그대로 등장했는지 여부 (LLM이 정규화한 이름은 False)"""
+    text = _compact(user_input)
+    merchants = set()
+    for spec in (value.get("spending") or {}).values():
+        if not isinstance(spec, dict):
+            continue
+        for merchant in spec.get("merchants") or []:
+            if isinstance(merchant, str) and merchant.strip():
+                merchants.add(_compact(merchant))
+    return tuple(sorted((m, m in text) for m in merchants))
+
+
+def _merchants_match(signature: Tuple[Tuple[str, bool], ...], user_input: str) -> bool:
+    """캐시된 가맹점 각각이 새 입력에도 같은 방식(등장/미등장)으로 나타나는지 확인"""
+    text = _compact(user_input)
+    return all((merchant in text) == present for merchant, present in signature)
+
+
+class SemanticCache:
+    """
+    임베딩 유사도 캐시
+
+    namespace(모델명 + 프롬프트 버전 등)가 다른 저장 행은 로드 시 삭제되므로,
+    프롬프트나 모델이 바뀌면 캐시가 자동으로 무효화됩니다.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        db_path: Optional[str] = SEMANTIC_CACHE_DB_PATH,
+    ):
+        """
+        Args:
+            namespace: 캐시 구분 키 (다르면 기존 행 무효화)
+            threshold: 재사용할 최소 코사인 유사도
+            max_entries: 최대 보관 개수 (초과 시 오래된 것부터 교체)
+            db_path: SQLite 파일 경로 (None이면 메모리에만 보관)
+        """
+        self.namespace = namespace
+        self.threshold = threshold
+        self.max_entries = max(1, int(max_entries))
+
+        # 행렬 행 i ↔ _row_ids[i] / _numbers[i] / _merchants[i] / _values[i]
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._next = 0  # 가득 찼을 때 다음에 덮어쓸 (가장 오래된) 행
+        self._row_ids: List[Optional[int]] = []
+        self._numbers: List[Tuple[str, ...]] = []
+        self._merchants: List[Tuple[Tuple[str, bool], ...]] = []
+        self._values: List[Dict] = []
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS semantic_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    user_input TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    value_json TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._load()
+
+    def _load(self):
+        """현재 namespace 행만 메모리로 올리고 나머지는 삭제"""
+        with self._conn:
+            self._conn.execute("DELETE FROM semantic_cache WHERE namespace != ?", (self.namespace,))
+        rows = self._conn.execute(
+            "SELECT id, user_input, embedding, value_json FROM semantic_cache "
+            "WHERE namespace = ? ORDER BY id DESC LIMIT ?",
+            (self.namespace, self.max_entries),
+        ).fetchall()
+        for row_id, user_input, blob, value_json in reversed(rows):
+            self._append(np.frombuffer(blob, dtype=np.float32), user_input, json.loads(value_json), row_id)
+        # LIMIT 밖으로 밀려난 오래된 행 정리
+        if rows:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM semantic_cache WHERE namespace = ? AND id < ?",
+                    (self.namespace, rows[-1][0]),
+                )
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def _append(self, vec: np.ndarray, user_input: str, value: Dict, row_id: Optional[int]) -> Optional[int]:
+        """행 추가 후 밀려난 행의 row_id 반환 (없으면 None)"""
+        if self._matrix is None:
+            self._matrix = np.zeros((min(16, self.max_entries), vec.shape[0]), dtype=np.float32)
+
+        evicted: Optional[int] = None
+        if self._size < self._matrix.shape[0]:
+            idx = self._size
+        elif self._size < self.max_entries:
+            grown = np.zeros(
+                (min(self.max_entries, self._matrix.shape[0] * 2), self._matrix.shape[1]), dtype=np.float32
+            )
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+            idx = self._size
+        else:
+            idx = self._next
+            self._next = (self._next + 1) % self.max_entries
+            evicted = self._row_ids[idx]
+
+        self._matrix[idx] = vec
+        numbers = _number_signature(user_input)
+        merchants = _merchant_signature(value, user_input)
+        if idx == self._size:
+            self._row_ids.append(row_id)
+            self._numbers.append(numbers)
+            self._merchants.append(merchants)
+            self._values.append(value)
+            self._size += 1
+        else:
+            self._row_ids[idx] = row_id
+            self._numbers[idx] = numbers
+            self._merchants[idx] = merchants
+            self._values[idx] = value
+        return evicted
+
+    def lookup(self, embedding, user_input: str) -> Optional[Dict]:
+        """
+        가장 유사한 캐시 항목의 값 반환 (유사도 < threshold이거나 숫자/가맹점이 다르면 None)
+        """
+        with self._lock:
+            if self._matrix is None or self._size == 0:
+                return None
+            vec = self._normalize(embedding)
+            sims = self._matrix[: self._size] @ vec
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold or self._numbers[best] != _number_signature(user_input):
+                return None
+            if not _merchants_match(self._merchants[best], user_input):
+                return None
+            return copy.deepcopy(self._values[best])
+
+    def add(self, embedding, user_input: str, value: Dict):
+        """입력 임베딩과 결과 저장"""
+        vec = self._normalize(embedding)
+        value = copy.deepcopy(value)
+        with self._lock:
+            row_id: Optional[int] = None
+            if self._conn is not None:
+                with self._conn:
+                    cur = self._conn.execute(
+                        "INSERT INTO semantic_cache (namespace, user_input, embedding, value_json, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, user_input, vec.tobytes(), json.dumps(value, ensure_ascii=False), time.time()),
+                    )
+                row_id = cur.lastrowid
+
+            evicted = self._append(vec, user_input, value, row_id)
+            if evicted is not None and self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM semantic_cache WHERE id = ?", (evicted,))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -6,22 +6,36 @@
 """
 
 import asyncio
-import json
+import hashlib
 import os
-from datetime import datetime, timedelta
+import time
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Deque, Dict, List, Optional, Tuple, Union
 import httpx
-from dotenv import load_dotenv
+import orjson
 
-load_dotenv()
+from data_collection.data_parser import (
+    invalidate_compressed_context,
+    parse_card_data,
+    save_compressed_contexts_bulk,
+)
 
 # 카드고릴라 API 기본 URL
 BASE_URL = "https://api.card-gorilla.com:8080/v1"
 
+# 공유 HTTP 클라이언트 커넥션 풀 (카드마다 TCP/TLS 연결을 새로 맺지 않음)
+HTTP_MAX_CONNECTIONS = 50
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# fetch_cards_batch 동시 요청 수 (RateLimiter 초당 요청 수와 맞춤)
+BATCH_MAX_CONCURRENCY = 5
+
 
 class RateLimiter:
     """Rate limiting을 위한 클래스"""
+
+    __slots__ = ("max_requests", "time_window", "requests")
     
     def __init__(self, max_requests: int = 5, time_window: int = 1):
         """
@@ -31,53 +45,91 @@ class RateLimiter:
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = []  # 요청 시간 기록
+        self.requests: Deque[float] = deque()  # 요청 시각 기록 (time.monotonic, 오래된 순)
+    
+    def _drain(self, now: float):
+        """time_window 밖으로 벗어난 요청 기록을 앞에서부터 제거"""
+        while self.requests and now - self.requests[0] >= self.time_window:
+            self.requests.popleft()
     
     async def acquire(self):
         """요청 전에 속도 확인하고 필요시 대기"""
-        now = datetime.now()
+        now = time.monotonic()
+        self._drain(now)
         
-        # 최근 time_window 내 요청만 남기기
-        self.requests = [
-            req_time for req_time in self.requests 
-            if now - req_time < timedelta(seconds=self.time_window)
-        ]
-        
-        # 제한 초과시 대기
-        if len(self.requests) >= self.max_requests:
-            wait_time = (self.requests[0] + timedelta(seconds=self.time_window) - now).total_seconds()
+        # 제한 초과시 가장 오래된 요청이 윈도우를 벗어날 때까지 대기
+        # (동시에 깨어난 코루틴끼리 초과하지 않도록 다시 확인)
+        while len(self.requests) >= self.max_requests:
+            wait_time = self.requests[0] + self.time_window - now
             if wait_time > 0:
                 await asyncio.sleep(wait_time)
-                # 대기 후 다시 정리
-                now = datetime.now()
-                self.requests = [
-                    req_time for req_time in self.requests 
-                    if now - req_time < timedelta(seconds=self.time_window)
-                ]
+            now = time.monotonic()
+            self._drain(now)
         
         # 요청 기록
-        self.requests.append(datetime.now())
+        self.requests.append(now)
 
 
 class CardGorillaClient:
     """카드고릴라 API 클라이언트"""
 
+    __slots__ = (
+        "rate_limiter",
+        "timeout",
+        "_http",
+        "_content_hashes",
+        "mongo_client",
+        "cards_collection",
+        "async_cards_collection",
+    )
+
     def __init__(self):
         """CardGorillaClient 초기화 (MongoDB 전용)"""
         self.rate_limiter = RateLimiter(max_requests=5, time_window=1)
         self.timeout = httpx.Timeout(30.0, connect=10.0)
+        self._http: Optional[httpx.AsyncClient] = None
+        # card_id → 마지막으로 저장한 압축 컨텍스트 해시 (내용이 같으면 재저장 생략)
+        self._content_hashes: Dict[int, bytes] = {}
 
         # MongoDB 연결 (필수)
         from database.mongodb_client import MongoDBClient
         self.mongo_client = MongoDBClient()
         self.cards_collection = self.mongo_client.get_collection("cards")
+        # fetch/save 경로는 async 메서드에서 호출되므로 motor로 조회/저장 (이벤트 루프를 막지 않음)
+        self.async_cards_collection = self.mongo_client.get_async_collection("cards")
         print("✅ CardGorillaClient: MongoDB 연결됨")
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """keep-alive 커넥션을 재사용하는 공유 AsyncClient (첫 사용 시 생성, 닫혔으면 재생성)"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return self._http
+
+    async def aclose(self):
+        """공유 HTTP 클라이언트 종료"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "CardGorillaClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     async def fetch_card_detail(
         self,
         card_id: int,
         use_cache: bool = True,
-        return_reason: bool = False
+        return_reason: bool = False,
+        pending_saves: Optional[Dict[int, Tuple[Dict, bytes]]] = None
     ) -> Union[Optional[Dict], Tuple[Optional[Dict], Optional[str]]]:
         """
         카드 상세 정보 조회
@@ -85,6 +137,7 @@ class CardGorillaClient:
         Args:
             card_id: 카드 ID
             use_cache: 캐시 사용 여부
+            pending_saves: 주면 MongoDB에 카드마다 저장하지 않고 여기에 모음 (save_pending으로 일괄 저장)
         
         Returns:
             카드 데이터 (Dict) 또는 None (404 등)
@@ -112,39 +165,45 @@ class CardGorillaClient:
         
         for attempt in range(max_retries):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.get(url)
-                    
-                    if response.status_code == 404:
-                        reason = "not_found"
-                        print(f"⚠️  카드를 찾을 수 없음 (card_id={card_id})")
-                        return _response(None)
-                    
-                    if response.status_code == 429:
-                        wait_time = 60 * (2 ** attempt)  # 지수 백오프
-                        print(f"⏳ Rate limit 초과, {wait_time}초 대기...")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # 단종 카드 제외
-                    if data.get("is_discon", False):
-                        reason = "discontinued"
-                        print(f"⏭️  단종 카드 제외 (card_id={card_id})")
-                        return _response(None)
-                    
-                    # 압축 컨텍스트로 변환 및 저장
-                    compressed = self._compress_context(data)
-                    if compressed:
-                        # MongoDB에 저장
-                        await self._save_to_mongodb(card_id, compressed)
+                response = await self.http.get(url)
+                
+                if response.status_code == 404:
+                    reason = "not_found"
+                    print(f"⚠️  카드를 찾을 수 없음 (card_id={card_id})")
+                    return _response(None)
+                
+                if response.status_code == 429:
+                    wait_time = 60 * (2 ** attempt)  # 지수 백오프
+                    print(f"⏳ Rate limit 초과, {wait_time}초 대기...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                
+                response.raise_for_status()
+                # 응답 바이트를 그대로 orjson에 전달 (str 디코드 단계 없음)
+                data = orjson.loads(response.content)
+                
+                # 단종 카드 제외
+                if data.get("is_discon", False):
+                    reason = "discontinued"
+                    print(f"⏭️  단종 카드 제외 (card_id={card_id})")
+                    return _response(None)
+                
+                # 압축 컨텍스트로 변환 및 저장
+                compressed = self._compress_context(data)
+                if compressed:
+                    content_hash = self._content_hash(compressed)
+                    if self._content_hashes.get(card_id) == content_hash:
+                        print(f"⏭️  변경 없음, 저장 생략 (card_id={card_id})")
+                    elif pending_saves is not None:
+                        pending_saves[card_id] = (compressed, content_hash)
+                    # MongoDB에 저장
+                    elif await self._save_to_mongodb(card_id, compressed):
+                        self._content_hashes[card_id] = content_hash
                         print(f"✅ 카드 저장 완료 (card_id={card_id})")
 
-                    reason = None
-                    return _response(compressed)
-                    
+                reason = None
+                return _response(compressed)
+                
             except httpx.TimeoutException:
                 reason = "timeout"
                 if attempt < max_retries - 1:
@@ -190,16 +249,26 @@ class CardGorillaClient:
         """
         results = {}
         errors = []
-        
-        for card_id in card_ids:
-            try:
-                data = await self.fetch_card_detail(card_id, use_cache=use_cache)
-                if data:
-                    results[card_id] = data
-                # 너무 빠르게 요청하지 않도록 약간의 딜레이
-                await asyncio.sleep(0.2)
-            except Exception as e:
-                errors.append({"card_id": card_id, "error": str(e)})
+        # 변경된 카드는 카드마다 update_one하지 않고 모아서 bulk_write로 저장
+        pending_saves: Dict[int, Tuple[Dict, bytes]] = {}
+
+        # 전체 속도는 fetch_card_detail 내부 RateLimiter가 제어하고, 세마포어는 동시 요청 수만 제한
+        sem = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def _fetch_with_sem(card_id: int) -> Optional[Dict]:
+            async with sem:
+                return await self.fetch_card_detail(card_id, use_cache=use_cache, pending_saves=pending_saves)
+
+        outcomes = await asyncio.gather(
+            *(_fetch_with_sem(card_id) for card_id in card_ids),
+            return_exceptions=True,
+        )
+        for card_id, outcome in zip(card_ids, outcomes):
+            if isinstance(outcome, Exception):
+                errors.append({"card_id": card_id, "error": str(outcome)})
+            elif outcome:
+                results[card_id] = outcome
+        await self.save_pending(pending_saves)
         
         if errors:
             print(f"⚠️  {len(errors)}개 카드 조회 실패")
@@ -208,9 +277,31 @@ class CardGorillaClient:
         
         return results
     
+    async def save_pending(self, pending_saves: Dict[int, Tuple[Dict, bytes]]) -> Dict[str, List[int]]:
+        """
+        fetch_card_detail(pending_saves=...)로 모은 카드를 일괄 저장하고 pending_saves를 비움
+
+        Returns:
+            {"success": [card_id...], "failed": [card_id...]}
+        """
+        if not pending_saves:
+            return {"success": [], "failed": []}
+        saved = await asyncio.to_thread(
+            save_compressed_contexts_bulk, [compressed for compressed, _ in pending_saves.values()]
+        )
+        # 저장에 성공한 카드만 해시 기록 (실패한 카드는 다음 수집 때 다시 저장 시도)
+        for card_id in saved["success"]:
+            entry = pending_saves.get(card_id)
+            if entry is not None:
+                self._content_hashes[card_id] = entry[1]
+        pending_saves.clear()
+        return saved
+
     def _compress_context(self, raw_data: Dict) -> Optional[Dict]:
         """
         원본 API 응답을 압축 컨텍스트 형식으로 변환
+
+        변환 로직은 data_parser.parse_card_data 하나로 유지합니다.
         
         Args:
             raw_data: 원본 API 응답
@@ -218,76 +309,13 @@ class CardGorillaClient:
         Returns:
             압축 컨텍스트 Dict 또는 None (단종 카드 등)
         """
-        # 단종 카드 재확인
-        if raw_data.get("is_discon", False):
-            return None
-        
-        # 화이트리스트 필드만 추출
-        corp = raw_data.get("corp", {})
-        
-        compressed = {
-            "meta": {
-                "id": raw_data.get("idx"),
-                "corpCode": raw_data.get("cid"),
-                "name": raw_data.get("name", ""),
-                "issuer": corp.get("name", ""),
-                "type": raw_data.get("c_type", "")
-            },
-            "conditions": {
-                "prev_month_min": raw_data.get("pre_month_money", 0)
-            },
-            "fees": {
-                "annual_basic": raw_data.get("annual_fee_basic", ""),
-                "annual_detail": raw_data.get("annual_fee_detail", "")
-            },
-            "hints": {
-                "top_tags": [],
-                "top_titles": [],
-                "search_titles": [],
-                "search_options": [],
-                "brands": []
-            },
-            "benefits_html": []
-        }
-        
-        # top_benefit 처리
-        top_benefits = raw_data.get("top_benefit", [])
-        for benefit in top_benefits:
-            if benefit.get("tags"):
-                compressed["hints"]["top_tags"].extend(benefit["tags"])
-            if benefit.get("title"):
-                compressed["hints"]["top_titles"].append(benefit["title"])
-        
-        # search_benefit 처리
-        search_benefits = raw_data.get("search_benefit", [])
-        for benefit in search_benefits:
-            if benefit.get("title"):
-                compressed["hints"]["search_titles"].append(benefit["title"])
-            if benefit.get("options"):
-                for option in benefit["options"]:
-                    if option.get("label"):
-                        compressed["hints"]["search_options"].append(option["label"])
-        
-        # brand 처리
-        brands = raw_data.get("brand", [])
-        for brand in brands:
-            if brand.get("name"):
-                compressed["hints"]["brands"].append(brand["name"])
-        
-        # key_benefit 처리
-        key_benefits = raw_data.get("key_benefit", [])
-        for benefit in key_benefits:
-            cate = benefit.get("cate", {})
-            category_name = cate.get("name", "")
-            info_html = benefit.get("info", "")
-            
-            if category_name and info_html:
-                compressed["benefits_html"].append({
-                    "category": category_name,
-                    "html": info_html
-                })
-        
-        return compressed
+        return parse_card_data(raw_data)
+
+    @staticmethod
+    def _content_hash(compressed: Dict) -> bytes:
+        """압축 컨텍스트 변경 감지용 해시 (키 정렬 직렬화 → blake2b 16바이트)"""
+        payload = orjson.dumps(compressed, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return hashlib.blake2b(payload, digest_size=16).digest()
 
     async def _save_to_mongodb(self, card_id: int, card_data: Dict) -> bool:
         """
@@ -302,7 +330,7 @@ class CardGorillaClient:
         """
         try:
             from datetime import datetime as dt
-            self.cards_collection.update_one(
+            await self.async_cards_collection.update_one(
                 {"card_id": card_id},
                 {
                     "$set": {
@@ -317,6 +345,8 @@ class CardGorillaClient:
                 },
                 upsert=True
             )
+            # 추천/응답 생성의 프로세스 캐시가 갱신 전 데이터를 돌려주지 않도록 무효화
+            invalidate_compressed_context(card_id)
             return True
         except Exception as e:
             print(f"⚠️  MongoDB 저장 실패 (card_id={card_id}): {e}")
@@ -333,7 +363,7 @@ class CardGorillaClient:
             카드 데이터 또는 None
         """
         try:
-            doc = self.cards_collection.find_one(
+            doc = await self.async_cards_collection.find_one(
                 {"card_id": card_id},
                 {"_id": 0, "embeddings": 0, "created_at": 0, "updated_at": 0, "is_discon": 0}
             )
@@ -350,14 +380,19 @@ class CardGorillaClient:
             card_id: 특정 카드 ID (None이면 전체 삭제)
         """
         try:
+            invalidate_compressed_context(card_id or None)
+            if card_id:
+                self._content_hashes.pop(card_id, None)
+            else:
+                self._content_hashes.clear()
             if card_id:
-                result = self.cards_collection.delete_one({"card_id": card_id})
+                result = await self.async_cards_collection.delete_one({"card_id": card_id})
                 if result.deleted_count > 0:
                     print(f"🗑️  카드 삭제 (card_id={card_id})")
                 else:
                     print(f"⚠️  카드를 찾을 수 없음 (card_id={card_id})")
             else:
-                result = self.cards_collection.delete_many({})
+                result = await self.async_cards_collection.delete_many({})
                 print(f"🗑️  전체 카드 삭제 완료 ({result.deleted_count}개)")
         except Exception as e:
             print(f"❌ 카드 삭제 실패: {e}")
@@ -366,19 +401,18 @@ class CardGorillaClient:
 # 사용 예시
 async def main():
     """테스트용 메인 함수"""
-    client = CardGorillaClient()
-    
-    # 단일 카드 조회
-    card_data = await client.fetch_card_detail(2862)
-    if card_data:
-        print(f"카드명: {card_data['meta']['name']}")
-        print(f"발급사: {card_data['meta']['issuer']}")
-        print(f"전월실적: {card_data['conditions']['prev_month_min']:,}원")
-    
-    # 배치 조회
-    # card_ids = [2862, 1357, 2000]
-    # results = await client.fetch_cards_batch(card_ids)
-    # print(f"조회 완료: {len(results)}개")
+    async with CardGorillaClient() as client:
+        # 단일 카드 조회
+        card_data = await client.fetch_card_detail(2862)
+        if card_data:
+            print(f"카드명: {card_data['meta']['name']}")
+            print(f"발급사: {card_data['meta']['issuer']}")
+            print(f"전월실적: {card_data['conditions']['prev_month_min']:,}원")
+        
+        # 배치 조회
+        # card_ids = [2862, 1357, 2000]
+        # results = await client.fetch_cards_batch(card_ids)
+        # print(f"조회 완료: {len(results)}개")
 
 
 if __name__ == "__main__":
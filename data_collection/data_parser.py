@@ -6,9 +6,26 @@
 별도로 사용할 수 있도록 독립적인 함수로도 제공합니다.
 """
 
-import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+
+# load_compressed_context 프로세스 캐시 (추천/응답 생성에서 같은 카드를 반복 조회하므로 MongoDB 왕복 생략)
+# 카드 데이터는 관리자 동기화 때만 바뀌므로 TTL + invalidate_compressed_context로 갱신
+COMPRESSED_CONTEXT_CACHE_TTL_SECONDS = 600
+COMPRESSED_CONTEXT_CACHE_MAX_ENTRIES = 4096
+_ctx_cache: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+_ctx_cache_lock = threading.Lock()
+
+# save_compressed_contexts_bulk: bulk_write 1회당 카드(UpdateOne) 개수
+COMPRESSED_CONTEXT_BULK_BATCH_SIZE = 1000
 
 
 def parse_card_data(raw_data: Dict) -> Optional[Dict]:
@@ -27,82 +44,112 @@ def parse_card_data(raw_data: Dict) -> Optional[Dict]:
         >>> print(compressed["meta"]["name"])
         MG+ S 하나카드
     """
+    # dict.get 메서드 조회를 한 번만 (필드마다 속성 조회 생략)
+    get = raw_data.get
+    
     # 단종 카드 제외
-    if raw_data.get("is_discon", False):
+    if get("is_discon", False):
         return None
     
     # 화이트리스트 필드만 추출
-    corp = raw_data.get("corp", {})
+    corp = get("corp", {})
+    
+    top_benefits = get("top_benefit", [])
+    search_benefits = get("search_benefit", [])
+    
+    # hints/benefits_html은 리스트 컴프리헨션으로 한 번에 생성 (루프마다 append/extend 조회 생략)
+    key_benefit_pairs = (
+        (benefit.get("cate", {}).get("name", ""), benefit.get("info", ""))
+        for benefit in get("key_benefit", [])
+    )
     
     compressed = {
         "meta": {
-            "id": raw_data.get("idx"),
-            "corpCode": raw_data.get("cid"),
-            "name": raw_data.get("name", ""),
+            "id": get("idx"),
+            "corpCode": get("cid"),
+            "name": get("name", ""),
             "issuer": corp.get("name", ""),
-            "type": raw_data.get("c_type", "")
+            "type": get("c_type", "")
         },
         "conditions": {
-            "prev_month_min": raw_data.get("pre_month_money", 0)
+            "prev_month_min": get("pre_month_money", 0)
         },
         "fees": {
-            "annual_basic": raw_data.get("annual_fee_basic", ""),
-            "annual_detail": raw_data.get("annual_fee_detail", "")
+            "annual_basic": get("annual_fee_basic", ""),
+            "annual_detail": get("annual_fee_detail", "")
         },
         "hints": {
-            "top_tags": [],
-            "top_titles": [],
-            "search_titles": [],
-            "search_options": [],
-            "brands": []
+            "top_tags": list(chain.from_iterable(benefit["tags"] for benefit in top_benefits if benefit.get("tags"))),
+            "top_titles": [benefit["title"] for benefit in top_benefits if benefit.get("title")],
+            "search_titles": [benefit["title"] for benefit in search_benefits if benefit.get("title")],
+            "search_options": [
+                option["label"]
+                for benefit in search_benefits
+                for option in (benefit.get("options") or ())
+                if option.get("label")
+            ],
+            "brands": [brand["name"] for brand in get("brand", []) if brand.get("name")]
         },
-        "benefits_html": []
+        "benefits_html": [
+            {"category": category_name, "html": info_html}
+            for category_name, info_html in key_benefit_pairs
+            if category_name and info_html
+        ]
     }
     
-    # top_benefit 처리
-    top_benefits = raw_data.get("top_benefit", [])
-    for benefit in top_benefits:
-        if benefit.get("tags"):
-            compressed["hints"]["top_tags"].extend(benefit["tags"])
-        if benefit.get("title"):
-            compressed["hints"]["top_titles"].append(benefit["title"])
-    
-    # search_benefit 처리
-    search_benefits = raw_data.get("search_benefit", [])
-    for benefit in search_benefits:
-        if benefit.get("title"):
-            compressed["hints"]["search_titles"].append(benefit["title"])
-        if benefit.get("options"):
-            for option in benefit["options"]:
-                if option.get("label"):
-                    compressed["hints"]["search_options"].append(option["label"])
-    
-    # brand 처리
-    brands = raw_data.get("brand", [])
-    for brand in brands:
-        if brand.get("name"):
-            compressed["hints"]["brands"].append(brand["name"])
-    
-    # key_benefit 처리
-    key_benefits = raw_data.get("key_benefit", [])
-    for benefit in key_benefits:
-        cate = benefit.get("cate", {})
-        category_name = cate.get("name", "")
-        info_html = benefit.get("info", "")
-        
-        if category_name and info_html:
-            compressed["benefits_html"].append({
-                "category": category_name,
-                "html": info_html
-            })
-    
     return compressed
 
 
+# 압축 컨텍스트에 필요한 필드만 조회 (embeddings 제외)
+_CTX_PROJECTION = {
+    "_id": 0,
+    "card_id": 1,
+    "meta": 1,
+    "conditions": 1,
+    "fees": 1,
+    "hints": 1,
+    "benefits_html": 1,
+}
+
+
+def _ctx_cache_get(card_id: int) -> Optional[Dict]:
+    with _ctx_cache_lock:
+        entry = _ctx_cache.get(card_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > COMPRESSED_CONTEXT_CACHE_TTL_SECONDS:
+            _ctx_cache.pop(card_id, None)
+            return None
+        _ctx_cache.move_to_end(card_id)
+        return entry[1]
+
+
+def _ctx_cache_put(card_id: int, compressed_context: Dict):
+    with _ctx_cache_lock:
+        _ctx_cache[card_id] = (time.monotonic(), compressed_context)
+        _ctx_cache.move_to_end(card_id)
+        while len(_ctx_cache) > COMPRESSED_CONTEXT_CACHE_MAX_ENTRIES:
+            _ctx_cache.popitem(last=False)
+
+
+def _to_compressed_context(card_doc: Dict) -> Dict:
+    # 필요한 필드만 추출
+    return {
+        "meta": card_doc.get("meta", {}),
+        "conditions": card_doc.get("conditions", {}),
+        "fees": card_doc.get("fees", {}),
+        "hints": card_doc.get("hints", {}),
+        "benefits_html": card_doc.get("benefits_html", [])
+    }
+
+
 def load_compressed_context(card_id: int, cache_dir: str = "data/cache/ctx") -> Optional[Dict]:
     """
     MongoDB에서 압축 컨텍스트 로드 (MongoDB 전용)
 
+    결과는 COMPRESSED_CONTEXT_CACHE_TTL_SECONDS 동안 프로세스 메모리에 캐시되며,
+    캐시된 Dict는 여러 호출자가 공유하므로 읽기 전용으로 사용해야 합니다.
+
     Args:
         card_id: 카드 ID
         cache_dir: (사용 안 함, 하위 호환성을 위해 유지)
@@ -110,42 +157,66 @@ def load_compressed_context(card_id: int, cache_dir: str = "data/cache/ctx") ->
     Returns:
         압축 컨텍스트 Dict 또는 None
     """
-    try:
-        from database.mongodb_client import MongoDBClient
+    # 캐시 확인/조회/캐시 저장은 일괄 로더와 같은 경로 사용
+    return load_compressed_contexts([card_id]).get(card_id)
 
-        mongo_client = MongoDBClient()
-        collection = mongo_client.get_collection("cards")
-
-        # MongoDB에서 카드 조회 (embeddings 제외)
-        card_doc = collection.find_one(
-            {"card_id": card_id},
-            {
-                "_id": 0,
-                "meta": 1,
-                "conditions": 1,
-                "fees": 1,
-                "hints": 1,
-                "benefits_html": 1
-            }
-        )
-
-        if card_doc:
-            # 필요한 필드만 추출
-            compressed_context = {
-                "meta": card_doc.get("meta", {}),
-                "conditions": card_doc.get("conditions", {}),
-                "fees": card_doc.get("fees", {}),
-                "hints": card_doc.get("hints", {}),
-                "benefits_html": card_doc.get("benefits_html", [])
-            }
-            return compressed_context
+
+def load_compressed_contexts(card_ids: List[int]) -> Dict[int, Dict]:
+    """
+    여러 카드의 압축 컨텍스트를 한 번에 로드
+
+    캐시에 없는 카드만 {"card_id": {"$in": [...]}} 쿼리 1회로 가져옵니다.
+    (카드마다 find_one을 보내는 N번의 왕복을 1번으로 줄임)
+
+    Args:
+        card_ids: 카드 ID 리스트 (중복 허용)
+
+    Returns:
+        {card_id: 압축 컨텍스트} (찾지 못한 카드는 제외)
+    """
+    contexts: Dict[int, Dict] = {}
+    missing: List[int] = []
+    for card_id in dict.fromkeys(card_ids):
+        cached = _ctx_cache_get(card_id)
+        if cached is not None:
+            contexts[card_id] = cached
         else:
-            print(f"⚠️  MongoDB에서 카드를 찾을 수 없음 (card_id={card_id})")
-            return None
+            missing.append(card_id)
+
+    if not missing:
+        return contexts
+
+    try:
+        from database.mongodb_client import MongoDBClient
 
+        collection = MongoDBClient().get_collection("cards")
+        # 결과를 한 번의 응답 배치로 받도록 cursor batch_size를 요청 개수에 맞춤
+        cursor = collection.find({"card_id": {"$in": missing}}, _CTX_PROJECTION).batch_size(len(missing))
+        for card_doc in cursor:
+            compressed_context = _to_compressed_context(card_doc)
+            _ctx_cache_put(card_doc["card_id"], compressed_context)
+            contexts[card_doc["card_id"]] = compressed_context
     except Exception as e:
-        print(f"⚠️  MongoDB 로드 실패 (card_id={card_id}): {e}")
-        return None
+        print(f"⚠️  MongoDB 일괄 로드 실패 ({len(missing)}개 카드): {e}")
+
+    not_found = [card_id for card_id in missing if card_id not in contexts]
+    if not_found:
+        print(f"⚠️  MongoDB에서 카드를 찾을 수 없음 (card_ids={not_found})")
+    return contexts
+
+
+def invalidate_compressed_context(card_id: Optional[int] = None):
+    """
+    load_compressed_context 캐시 무효화 (카드 데이터 갱신 후 호출)
+
+    Args:
+        card_id: 해당 카드만 삭제 (None이면 전체 삭제)
+    """
+    with _ctx_cache_lock:
+        if card_id is None:
+            _ctx_cache.clear()
+        else:
+            _ctx_cache.pop(card_id, None)
 
 
 def save_compressed_context(card_id: int, compressed_data: Dict, cache_dir: str = "data/cache/ctx"):
@@ -161,11 +232,85 @@ def save_compressed_context(card_id: int, compressed_data: Dict, cache_dir: str
     cache_dir_path.mkdir(parents=True, exist_ok=True)
     
     cache_file = cache_dir_path / f"{card_id}.json"
+    # 임시 파일에 다 쓴 뒤 rename으로 교체 → 중간에 프로세스가 죽어도 반쯤 쓰인 JSON이 남지 않음
+    tmp_file = cache_file.with_suffix(".json.tmp")
     
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(compressed_data, f, ensure_ascii=False, indent=2)
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(compressed_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, cache_file)
         print(f"✅ 컨텍스트 저장 완료 (card_id={card_id})")
     except Exception as e:
+        tmp_file.unlink(missing_ok=True)
         print(f"❌ 컨텍스트 저장 실패 (card_id={card_id}): {e}")
 
+
+def save_compressed_contexts_bulk(
+    compressed_list: List[Dict],
+    batch_size: int = COMPRESSED_CONTEXT_BULK_BATCH_SIZE
+) -> Dict[str, List[int]]:
+    """
+    여러 압축 컨텍스트를 MongoDB에 일괄 upsert
+
+    카드마다 update_one을 보내지 않고 batch_size개씩 bulk_write(ordered=False) 1회로 저장합니다.
+    문서 형식은 CardGorillaClient 저장 경로와 같습니다 (신규 문서만 created_at/embeddings/is_discon 초기화).
+
+    Args:
+        compressed_list: parse_card_data 결과 리스트 (None/ID 없는 항목은 건너뜀)
+        batch_size: bulk_write 1회당 카드 수
+
+    Returns:
+        {"success": [card_id...], "failed": [card_id...]}
+    """
+    from datetime import datetime as dt
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+    from database.mongodb_client import MongoDBClient
+
+    results: Dict[str, List[int]] = {"success": [], "failed": []}
+    collection = MongoDBClient().get_collection("cards")
+
+    docs = [
+        (compressed["meta"]["id"], compressed)
+        for compressed in compressed_list
+        if compressed and (compressed.get("meta") or {}).get("id") is not None
+    ]
+    for start in range(0, len(docs), max(1, batch_size)):
+        batch = docs[start:start + max(1, batch_size)]
+        now = dt.utcnow()
+        ops = [
+            UpdateOne(
+                {"card_id": card_id},
+                {
+                    "$set": {**compressed, "updated_at": now},
+                    "$setOnInsert": {"created_at": now, "embeddings": [], "is_discon": False},
+                },
+                upsert=True,
+            )
+            for card_id, compressed in batch
+        ]
+        batch_ids = [card_id for card_id, _ in batch]
+        try:
+            collection.bulk_write(ops, ordered=False)
+            results["success"].extend(batch_ids)
+        except BulkWriteError as e:
+            # ordered=False라 나머지 연산은 반영됨 → writeErrors의 index(ops 위치)에 해당하는 카드만 실패 처리
+            write_errors = e.details.get("writeErrors", [])
+            failed_indexes = {err["index"] for err in write_errors}
+            for err in write_errors[:5]:  # 처음 5개만 출력
+                print(f"❌ MongoDB 저장 실패 (card_id={batch_ids[err['index']]}): {err.get('errmsg')}")
+            for i, card_id in enumerate(batch_ids):
+                results["failed" if i in failed_indexes else "success"].append(card_id)
+        except Exception as e:
+            print(f"❌ MongoDB bulk_write 실패 ({len(ops)}개): {e}")
+            results["failed"].extend(batch_ids)
+        finally:
+            # 일부만 반영됐을 수도 있으므로 배치 전체를 무효화
+            for card_id in batch_ids:
+                invalidate_compressed_context(card_id)
+
+    print(f"✅ 컨텍스트 일괄 저장: 성공 {len(results['success'])}개, 실패 {len(results['failed'])}개")
+    return results
+
@@ -8,13 +8,20 @@ Singleton 패턴으로 구현되어 애플리케이션 전체에서 하나의 
 import os
 import time
 from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from dotenv import load_dotenv
 
-load_dotenv()
+from utils import load_env
+
+
+# 연결 풀/와이어 압축 기본값 (환경변수로 조정 가능)
+# 압축 라이브러리(zstandard 등)가 없으면 pymongo가 해당 압축기만 경고 후 제외하고, 서버와 합의된 것만 사용
+MONGODB_MAX_POOL_SIZE = 50
+MONGODB_MIN_POOL_SIZE = 4
+MONGODB_COMPRESSORS = "zstd,zlib"
 
 
 class MongoDBClient:
@@ -47,9 +54,20 @@ class MongoDBClient:
         self.retry_delay = retry_delay
 
         # 환경변수 로드
+        load_env()
         self.uri = os.getenv("MONGODB_URI")
         self.db_name = os.getenv("MONGODB_DATABASE", "radical_cardist")
         self.collection_name = os.getenv("MONGODB_COLLECTION_CARDS", "cards")
+        # 동기(pymongo)/비동기(motor) 클라이언트 공통 옵션
+        self.client_options = {
+            "serverSelectionTimeoutMS": 10000,
+            "connectTimeoutMS": 10000,
+            "socketTimeoutMS": 10000,
+            "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", str(MONGODB_MAX_POOL_SIZE))),
+            "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", str(MONGODB_MIN_POOL_SIZE))),
+            "compressors": os.getenv("MONGODB_COMPRESSORS", MONGODB_COMPRESSORS),
+            "retryWrites": True,
+        }
 
         # 환경변수 검증
         if not self.uri or "<username>" in self.uri or "<password>" in self.uri:
@@ -58,6 +76,9 @@ class MongoDBClient:
                 ".env 파일에 실제 MongoDB Atlas connection string을 설정해주세요."
             )
 
+        # 비동기(motor) 클라이언트는 처음 사용할 때 생성
+        self._async_client: Optional[AsyncIOMotorClient] = None
+
         # MongoDB 연결
         self._connect_with_retry()
         self._initialized = True
@@ -70,12 +91,7 @@ class MongoDBClient:
             try:
                 print(f"MongoDB 연결 시도 {attempt + 1}/{self.max_retries}...")
 
-                self.client: MongoClient = MongoClient(
-                    self.uri,
-                    serverSelectionTimeoutMS=10000,
-                    connectTimeoutMS=10000,
-                    socketTimeoutMS=10000
-                )
+                self.client: MongoClient = MongoClient(self.uri, **self.client_options)
 
                 # 연결 확인
                 self.client.admin.command('ping')
@@ -114,6 +130,23 @@ class MongoDBClient:
             return self._cards_collection
         return self.db[name]
 
+    def get_async_collection(self, name: Optional[str] = None) -> AsyncIOMotorCollection:
+        """
+        비동기(motor) 컬렉션 접근
+
+        async 핸들러에서 이벤트 루프를 막지 않고 조회할 때 사용합니다.
+        연결 풀은 동기 클라이언트와 별도이며, 첫 호출 시 한 번만 생성됩니다.
+
+        Args:
+            name: 컬렉션 이름 (기본값: cards)
+
+        Returns:
+            motor Collection 객체
+        """
+        if self._async_client is None:
+            self._async_client = AsyncIOMotorClient(self.uri, **self.client_options)
+        return self._async_client[self.db_name][name or self.collection_name]
+
     def health_check(self) -> bool:
         """
         MongoDB 연결 상태 확인
@@ -138,7 +171,7 @@ class MongoDBClient:
         try:
             collection = self.get_collection()
 
-            total_docs = collection.count_documents({})
+            total_docs = collection.estimated_document_count()
             with_embeddings = collection.count_documents({"embeddings.0": {"$exists": True}})
 
             # 일반 인덱스 정보
@@ -218,8 +251,37 @@ class MongoDBClient:
             print(f"⚠️  Security indexes 생성 실패: {e}")
             raise
 
+    def initialize_card_indexes(self):
+        """
+        카드 컬렉션 인덱스 초기화
+
+        - card_id: 카드 단건 조회/업서트
+        - updated_at + card_id: 관리자 카드 목록 정렬 (인메모리 정렬 방지)
+        """
+        cards = self.get_collection()
+        # 기존 DB의 기본 이름 인덱스(card_id_1)와 충돌하지 않도록 card_id 인덱스는 이름을 지정하지 않음
+        # 인덱스별로 따로 시도해 하나가 실패해도 나머지는 생성
+        index_specs = [
+            ("card_id", {}),
+            ([("updated_at", -1), ("card_id", 1)], {"name": "admin_list_updated_card"}),
+        ]
+        last_error: Optional[Exception] = None
+        for keys, options in index_specs:
+            try:
+                cards.create_index(keys, **options)
+            except Exception as e:
+                last_error = e
+                print(f"⚠️  Card index 생성 실패 ({options.get('name', keys)}): {e}")
+
+        if last_error is not None:
+            raise last_error
+        print("✅ Card indexes 생성 완료")
+
     def close(self):
         """MongoDB 연결 종료"""
+        if getattr(self, "_async_client", None):
+            self._async_client.close()
+            self._async_client = None
         if hasattr(self, "client") and self.client:
             self.client.close()
             print("MongoDB 연결 종료")
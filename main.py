@@ -3,11 +3,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import os
 from datetime import datetime
-from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional 
+
+# 환경 변수 로드 (프로젝트 모듈의 모듈 상수가 .env 값을 보도록 import보다 먼저, 프로세스당 1회)
+from utils import load_env
+load_env()
+
 # Security modules
 from security.prompt_validator import validate_user_input, PromptAttackException
 from security.request_logger import RequestLogger, RequestTimer
@@ -22,12 +27,9 @@ from agents.response_generator import ResponseGenerator
 from vector_store.vector_store import CardVectorStore
 from vector_store.embeddings import EmbeddingGenerator
 from data_collection.card_gorilla_client import CardGorillaClient
-from data_collection.data_parser import load_compressed_context
+from data_collection.data_parser import load_compressed_context, load_compressed_contexts
 from admin.routes import router as admin_router
 
-# 환경 변수 로드
-load_dotenv()
-
 # RAG + Agentic 서비스 전역 변수
 input_parser = None
 benefit_analyzer = None
@@ -164,6 +166,8 @@ async def lifespan(app: FastAPI):
         mongo_client = MongoDBClient()
         if mongo_client.health_check():
             print("✅ MongoDB Atlas 연결 성공")
+            # 관리자 라우터 등에서 재사용할 수 있도록 app.state에 저장
+            app.state.mongo_client = mongo_client
             stats = mongo_client.get_stats()
             if stats.get("total_documents"):
                 print(f"   📊 카드 문서: {stats['total_documents']}개")
@@ -196,6 +200,13 @@ async def lifespan(app: FastAPI):
         print(f"⚠️  RAG + Agentic 서비스 초기화 실패: {str(e)}")
         print("   /recommend/natural-language 엔드포인트는 사용할 수 없습니다.")
 
+    # 카드 컬렉션 인덱스 초기화
+    try:
+        mongo_client.initialize_card_indexes()
+    except Exception as e:
+        print(f"⚠️  Card indexes 초기화 실패: {e}")
+        print("   관리자 카드 목록 조회가 느려질 수 있습니다.")
+
     # Security 인덱스 초기화
     try:
         mongo_client.initialize_security_indexes()
@@ -207,6 +218,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown: 애플리케이션 종료 시
     print("🛑 서비스를 종료합니다...")
+    if card_client is not None:
+        await card_client.aclose()
     print("✅ 서비스가 안전하게 종료되었습니다.")
 
 # FastAPI 앱 생성 (lifespan 포함)
@@ -341,7 +354,7 @@ async def recommend_natural_language(
         # 1. 입력 파싱
         print(f"\n[INFO] Step 1: Input Parsing")
         print(f"Input: {user_input}")
-        user_intent = input_parser.parse(user_input)
+        user_intent = await input_parser.parse(user_input)
         timer.mark_step("step1_input_parsing_ms")
         print(f"Parsed Intent: {user_intent}")
         print(f"[PERF] Step 1 완료")
@@ -358,7 +371,8 @@ async def recommend_natural_language(
         print(f"Query: {query_text}")
         print(f"Filters: {filters}")
 
-        candidates = vector_store.search_cards(query_text, filters, top_m=5)
+        # 동기(블로킹) 검색은 스레드에서 실행해 이벤트 루프가 다른 요청을 처리할 수 있게 함
+        candidates = await asyncio.to_thread(vector_store.search_cards, query_text, filters, top_m=5)
         timer.mark_step("step2_vector_search_ms")
         print(f"Candidates Found: {len(candidates)}")
         for i, c in enumerate(candidates):
@@ -389,7 +403,11 @@ async def recommend_natural_language(
             for c in candidates
         ]
 
-        analysis_results = await benefit_analyzer.analyze_batch(user_pattern, card_contexts)
+        # LLM 분석 동안 후보 카드 메타데이터를 미리 캐시에 올려 Step 4/5의 MongoDB 조회를 없앰
+        analysis_results, _ = await asyncio.gather(
+            benefit_analyzer.analyze_batch(user_pattern, card_contexts),
+            asyncio.to_thread(load_compressed_contexts, [c["card_id"] for c in card_contexts]),
+        )
         timer.mark_step("step3_benefit_analysis_ms")
         print(f"Analysis Results: {len(analysis_results)} cards analyzed")
         print(f"[PERF] Step 3 완료")
@@ -405,11 +423,20 @@ async def recommend_natural_language(
         print(f"Net Benefit: {recommendation_result.get('score_breakdown', {}).get('net_benefit')}")
         print(f"[PERF] Step 4 완료")
         
-        # 5. 응답 생성
+        # 5. 응답 생성 (선택 카드 메타데이터는 한 번만 로드해 응답 생성과 응답 본문에 함께 사용)
         print(f"\n[INFO] Step 5: Response Generation")
+        selected_card_id = recommendation_result["selected_card"]
+        card_context = load_compressed_context(selected_card_id)
+        if not card_context:
+            raise HTTPException(
+                status_code=500,
+                detail="카드 메타데이터를 불러오지 못했습니다. 관리자에게 문의해주세요."
+            )
+
         recommendation_text = response_generator.generate(
             recommendation_result,
-            user_pattern=user_pattern
+            user_pattern=user_pattern,
+            card_data=card_context
         )
         timer.mark_step("step5_response_generation_ms")
         print("Response generated successfully.")
@@ -419,14 +446,6 @@ async def recommend_natural_language(
         total_time_seconds = timer.get_total_time() / 1000
         print(f"\n[PERF] ========== 전체 처리 완료: {total_time_seconds:.3f}초 ==========")
         print(f"[PERF] 단계별 시간: {timer.get_performance_dict()}")
-        
-        selected_card_id = recommendation_result["selected_card"]
-        card_context = load_compressed_context(selected_card_id)
-        if not card_context:
-            raise HTTPException(
-                status_code=500,
-                detail="카드 메타데이터를 불러오지 못했습니다. 관리자에게 문의해주세요."
-            )
 
         meta = card_context.get("meta", {})
         conditions = card_context.get("conditions", {})
@@ -606,7 +625,7 @@ async def recommend_structured(user_intent: dict):
         if filters:
             filters = {k: v for k, v in filters.items() if v is not None}
         
-        candidates = vector_store.search_cards(query_text, filters, top_m=5)
+        candidates = await asyncio.to_thread(vector_store.search_cards, query_text, filters, top_m=5)
         
         if not candidates:
             return {
@@ -628,7 +647,10 @@ async def recommend_structured(user_intent: dict):
             for c in candidates
         ]
         
-        analysis_results = await benefit_analyzer.analyze_batch(user_pattern, card_contexts)
+        analysis_results, _ = await asyncio.gather(
+            benefit_analyzer.analyze_batch(user_pattern, card_contexts),
+            asyncio.to_thread(load_compressed_contexts, [c["card_id"] for c in card_contexts]),
+        )
         
         # 3. 최종 선택
         recommendation_result = recommender.select_best_card(
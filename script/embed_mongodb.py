@@ -13,7 +13,7 @@ API 서버 없이 커맨드라인에서 실행할 수 있도록 만들었습니
 
 import argparse
 import asyncio
-import json
+import orjson
 import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -180,8 +180,8 @@ async def embed_cards(
                         print("    ⏭️  JSON 파일 없음, 건너뜀")
                         return
 
-                    with open(json_file, "r", encoding="utf-8") as f:
-                        card_data = json.load(f)
+                    with open(json_file, "rb") as f:
+                        card_data = orjson.loads(f.read())
                 else:
                     doc = generator.cards_collection.find_one(
                         {"card_id": int(cid)},
@@ -8,11 +8,13 @@ FastAPI 관리자 엔드포인트(`/admin/cards/fetch`)와 동일한 로직을 C
 
 import argparse
 import asyncio
-import json
+import os
 import sys
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
 
 # script/ 경로에서 실행 시 루트 경로를 import 경로에 추가
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -20,6 +22,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from data_collection.card_gorilla_client import CardGorillaClient
+from data_collection.data_parser import COMPRESSED_CONTEXT_BULK_BATCH_SIZE
 
 SKIPLIST_FILE = PROJECT_ROOT / "script/skipped_cards.json"
 SKIP_REASONS = {"discontinued", "not_found"}
@@ -30,8 +33,8 @@ def load_skip_entries() -> Dict[int, Dict[str, str]]:
     if not SKIPLIST_FILE.exists():
         return {}
     try:
-        with open(SKIPLIST_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(SKIPLIST_FILE, "rb") as f:
+            data = orjson.loads(f.read())
         entries = data.get("entries", data)
         return {int(card_id): info for card_id, info in entries.items()}
     except Exception as exc:
@@ -46,8 +49,11 @@ def save_skip_entries(entries: Dict[int, Dict[str, str]]) -> None:
         "updated_at": datetime.now(UTC).isoformat(),
         "entries": {str(card_id): info for card_id, info in entries.items()},
     }
-    with open(SKIPLIST_FILE, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    # 임시 파일에 쓴 뒤 교체 (중단돼도 기존 skip 목록이 깨지지 않음)
+    tmp_file = SKIPLIST_FILE.with_suffix(".json.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, SKIPLIST_FILE)
     print(f"📝 단종/미존재 카드 {len(entries)}개 기록 저장: {SKIPLIST_FILE}")
 
 
@@ -62,38 +68,56 @@ async def fetch_cards(
         card_ids: 조회할 카드 ID 이터러블
         overwrite: 기존 JSON 캐시 덮어쓰기 여부
     """
-    client = CardGorillaClient()
     card_ids = list(card_ids)
     new_skip_entries: Dict[int, Dict[str, str]] = {}
+    # 수집한 카드는 모아서 bulk_write로 저장 (카드마다 update_one 왕복하지 않음)
+    pending_saves: Dict[int, Tuple[Dict, bytes]] = {}
 
     success, failed, skipped = 0, 0, 0
     print(f"📥 카드 데이터 수집 시작: {card_ids[0]}~{card_ids[-1]} (총 {len(card_ids)}개)")
 
-    for idx, card_id in enumerate(card_ids, 1):
-        try:
-            if idx % 100 == 0:
-                progress = int(idx * 100 / len(card_ids))
-                print(f"  진행률 {idx}/{len(card_ids)} ({progress}%)")
-
-            card_data, reason = await client.fetch_card_detail(
-                card_id,
-                use_cache=not overwrite,
-                return_reason=True,
-            )
-
-            if card_data:
-                success += 1
-            elif reason in SKIP_REASONS:
-                skipped += 1
-                new_skip_entries[card_id] = {
-                    "reason": reason,
-                    "first_detected": datetime.now(UTC).isoformat(),
-                }
-            else:
+    # 중간에 예외가 나도 HTTP 커넥션 풀이 닫히도록 async with 사용
+    async with CardGorillaClient() as client:
+        async def flush_pending() -> int:
+            """모아 둔 카드를 일괄 저장하고 저장 실패한 카드 수를 반환"""
+            saved = await client.save_pending(pending_saves)
+            return len(saved["failed"])
+
+        for idx, card_id in enumerate(card_ids, 1):
+            try:
+                if idx % 100 == 0:
+                    progress = int(idx * 100 / len(card_ids))
+                    print(f"  진행률 {idx}/{len(card_ids)} ({progress}%)")
+
+                card_data, reason = await client.fetch_card_detail(
+                    card_id,
+                    use_cache=not overwrite,
+                    return_reason=True,
+                    pending_saves=pending_saves,
+                )
+
+                if card_data:
+                    success += 1
+                elif reason in SKIP_REASONS:
+                    skipped += 1
+                    new_skip_entries[card_id] = {
+                        "reason": reason,
+                        "first_detected": datetime.now(UTC).isoformat(),
+                    }
+                else:
+                    failed += 1
+            except Exception as exc:  # 안전망
                 failed += 1
-        except Exception as exc:  # 안전망
-            failed += 1
-            print(f"  ❌ card_id={card_id} 오류: {exc}")
+                print(f"  ❌ card_id={card_id} 오류: {exc}")
+
+            if len(pending_saves) >= COMPRESSED_CONTEXT_BULK_BATCH_SIZE:
+                save_failed = await flush_pending()
+                success -= save_failed
+                failed += save_failed
+
+        save_failed = await flush_pending()
+        success -= save_failed
+        failed += save_failed
 
     print(
         f"✅ 수집 완료: 성공 {success}개, 실패 {failed}개, 건너뜀 {skipped}개 "
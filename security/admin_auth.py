@@ -8,11 +8,9 @@ constant-time 비교로 타이밍 공격을 방지합니다.
 import os
 import secrets
 from fastapi import Header, HTTPException, Request
-from dotenv import load_dotenv
+from utils import load_env
 from .ip_utils import get_client_ip, hash_ip
 
-load_dotenv()
-
 
 class AdminAuth:
     """Admin API key 인증 관리자"""
@@ -24,6 +22,7 @@ class AdminAuth:
         Raises:
             ValueError: ADMIN_API_KEY가 설정되지 않았거나 기본값인 경우
         """
+        load_env()
         self.admin_api_key = os.getenv("ADMIN_API_KEY")
 
         if not self.admin_api_key or self.admin_api_key == "your_secure_admin_api_key_here":
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+관리자 임베딩 청크 처리(_iter_embed_chunks) 단위 테스트
+
+OpenAI/MongoDB 없이 가짜 EmbeddingGenerator로 청크 1개가 성공하는 경로를 확인합니다.
+
+사용법:
+    python -m pytest test/test_embed_chunks.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import admin.routes as routes
+
+
+class FakeEmbeddingGenerator:
+    """add_cards_bulk 호출을 기록하고 모든 카드를 성공으로 반환"""
+
+    def __init__(self):
+        self.calls: List[List[Dict[str, Any]]] = []
+
+    def add_cards_bulk(self, card_data_list: List[Dict[str, Any]], overwrite: bool) -> Dict[str, List[Dict]]:
+        self.calls.append(card_data_list)
+        return {
+            "success": [
+                {"card_id": d["meta"]["id"], "name": d["meta"].get("name", "")} for d in card_data_list
+            ],
+            "failed": [],
+            "skipped": [],
+        }
+
+
+async def _collect(generator: Any, card_ids: List[int], preloaded: Dict[int, Dict[str, Any]]) -> List[Dict]:
+    return [
+        chunk
+        async for chunk in routes._iter_embed_chunks(generator, card_ids, overwrite=False, preloaded=preloaded)
+    ]
+
+
+def test_successful_chunk_invalidates_saved_cards(monkeypatch):
+    invalidated: List[int] = []
+    monkeypatch.setattr(routes, "invalidate_compressed_context", invalidated.append)
+
+    preloaded = {
+        1: {"meta": {"id": 1, "name": "카드1"}},
+        2: {"meta": {"id": 2, "name": "카드2"}},
+    }
+    generator = FakeEmbeddingGenerator()
+
+    chunks = asyncio.run(_collect(generator, [1, 2], preloaded))
+
+    assert len(generator.calls) == 1
+    assert len(chunks) == 1
+    assert [item["card_id"] for item in chunks[0]["success"]] == [1, 2]
+    assert chunks[0]["failed"] == []
+    assert invalidated == [1, 2]
@@ -1,9 +1,31 @@
 """
 공통 유틸리티 함수
 
-함수 실행 시간 측정 등 공통 유틸리티 함수 제공
+함수 실행 시간 측정, 재시도, 공유 OpenAI 클라이언트/요청 한도 제어 등 공통 유틸리티 함수 제공
 """
 
-from .index import measure_time
+from .index import (
+    RateLimiter,
+    TokenBucket,
+    get_async_openai_client,
+    get_openai_client,
+    get_openai_rate_limiter,
+    load_env,
+    measure_time,
+    metrics_snapshot,
+    retry_openai,
+    retry_with_backoff,
+)
 
-__all__ = ["measure_time"]
+__all__ = [
+    "RateLimiter",
+    "TokenBucket",
+    "get_async_openai_client",
+    "get_openai_client",
+    "get_openai_rate_limiter",
+    "load_env",
+    "measure_time",
+    "metrics_snapshot",
+    "retry_openai",
+    "retry_with_backoff",
+]
@@ -1,19 +1,82 @@
 """
 공통 유틸리티 함수
 
-함수 실행 시간 측정 데코레이터 등 유틸리티 함수 제공
+함수 실행 시간 측정 데코레이터, 지수 백오프 재시도 데코레이터, 공유 OpenAI 클라이언트 등 유틸리티 함수 제공
 """
 
+import os
 import time
+import random
+import asyncio
 import functools
-from typing import Callable, Any
+import threading
+import weakref
+from collections import deque
+from typing import Callable, Any, Deque, Dict, Optional, Tuple, Type
 import inspect
 
 
+_env_loaded = False
+
+
+def load_env():
+    """
+    .env 파일을 프로세스당 한 번만 로드
+
+    모듈 import 시점이 아니라 설정이 실제로 필요한 생성자/클라이언트 팩토리에서 호출합니다.
+    (배포 환경에서 env_file 등으로 환경변수를 주입하면 .env 탐색은 사실상 no-op)
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _env_loaded = True
+
+
+# measure_time 측정값 보관 (이름별 최근 N개, 초 단위) → metrics_snapshot으로 p50/p95 집계
+PERF_SAMPLE_SIZE = 1024
+_timings: Dict[str, Deque[float]] = {}
+
+
+def record_timing(name: str, elapsed: float):
+    """실행 시간(초) 기록 (이름별 최근 PERF_SAMPLE_SIZE개만 유지)"""
+    samples = _timings.get(name)
+    if samples is None:
+        samples = _timings.setdefault(name, deque(maxlen=PERF_SAMPLE_SIZE))
+    samples.append(elapsed)
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, float]]:
+    """
+    이름별 실행 시간 통계 반환
+
+    Returns:
+        {이름: {"count", "p50_ms", "p95_ms", "max_ms"}}
+    """
+    snapshot: Dict[str, Dict[str, float]] = {}
+    for name, samples in list(_timings.items()):
+        values = sorted(samples)
+        if not values:
+            continue
+        last = len(values) - 1
+        snapshot[name] = {
+            "count": len(values),
+            "p50_ms": round(values[round(last * 0.50)] * 1000, 2),
+            "p95_ms": round(values[round(last * 0.95)] * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    return snapshot
+
+
 def measure_time(func_name: str = None, verbose: bool = True):
     """
     함수 실행 시간 측정 데코레이터 (동기/비동기 모두 지원) 
     
+    측정값은 verbose와 관계없이 record_timing으로 기록되므로, 동시 호출이 많은 함수는
+    verbose=False로 매 호출 출력 없이 metrics_snapshot()의 p50/p95로 확인할 수 있습니다.
+
     Args:
         func_name: 로그에 표시할 함수 이름 (기본값: 함수명)
         verbose: 상세 로그 출력 여부 (기본값: True)
@@ -50,6 +113,7 @@ def measure_time(func_name: str = None, verbose: bool = True):
                     result = await func(*args, **kwargs)
                     elapsed = time.perf_counter() - start_time
                     elapsed_ms = elapsed * 1000
+                    record_timing(display_name, elapsed)
                     
                     if verbose:
                         print(f"[PERF] {display_name}: {elapsed_ms:.2f}ms ({elapsed:.3f}초)")
@@ -58,6 +122,7 @@ def measure_time(func_name: str = None, verbose: bool = True):
                 except Exception as e:
                     elapsed = time.perf_counter() - start_time
                     elapsed_ms = elapsed * 1000
+                    record_timing(f"{display_name} (실패)", elapsed)
                     if verbose:
                         print(f"[PERF] {display_name} (실패): {elapsed_ms:.2f}ms ({elapsed:.3f}초)")
                     raise
@@ -71,6 +136,7 @@ def measure_time(func_name: str = None, verbose: bool = True):
                     result = func(*args, **kwargs)
                     elapsed = time.perf_counter() - start_time
                     elapsed_ms = elapsed * 1000
+                    record_timing(display_name, elapsed)
                     
                     if verbose:
                         print(f"[PERF] {display_name}: {elapsed_ms:.2f}ms ({elapsed:.3f}초)")
@@ -79,6 +145,7 @@ def measure_time(func_name: str = None, verbose: bool = True):
                 except Exception as e:
                     elapsed = time.perf_counter() - start_time
                     elapsed_ms = elapsed * 1000
+                    record_timing(f"{display_name} (실패)", elapsed)
                     if verbose:
                         print(f"[PERF] {display_name} (실패): {elapsed_ms:.2f}ms ({elapsed:.3f}초)")
                     raise
@@ -86,3 +153,349 @@ def measure_time(func_name: str = None, verbose: bool = True):
             return sync_wrapper
     
     return decorator
+
+
+def retry_with_backoff(
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    max_attempts: int = 6,
+    min_wait: float = 1.0,
+    max_wait: float = 60.0,
+    should_retry: Optional[Callable[[BaseException], bool]] = None,
+    retry_after: Optional[Callable[[BaseException], Optional[float]]] = None,
+    verbose: bool = True,
+):
+    """
+    지수 백오프(+랜덤 지터) 재시도 데코레이터 (동기/비동기 모두 지원)
+
+    n번째 재시도 전 대기 시간은 uniform(0, min(max_wait, min_wait * 2**n)) 이며
+    최소 min_wait초를 보장합니다. max_attempts회 모두 실패하면 마지막 예외를 그대로 발생시킵니다.
+
+    Args:
+        retry_on: 재시도할 예외 타입 튜플
+        max_attempts: 최대 시도 횟수 (첫 호출 포함)
+        min_wait: 최소 대기 시간(초)
+        max_wait: 최대 대기 시간(초)
+        should_retry: 예외를 받아 재시도 여부를 판단하는 함수 (False면 즉시 전파)
+        retry_after: 예외에서 서버가 지정한 대기 시간(초)을 꺼내는 함수 (None 반환 시 백오프 사용)
+        verbose: 재시도 로그 출력 여부
+
+    사용 예시:
+        from utils import retry_with_backoff
+
+        @retry_with_backoff(retry_on=(openai.RateLimitError,))
+        def create_embeddings(self, batch):
+            ...
+    """
+    def _wait_seconds(exc: BaseException, attempt: int) -> float:
+        if retry_after is not None:
+            hinted = retry_after(exc)
+            if hinted is not None:
+                # 서버 지정 대기 시간 + 소량의 지터 (동시 재시도 분산)
+                return min(max_wait, max(0.0, hinted)) + random.uniform(0, min_wait)
+        upper = min(max_wait, min_wait * (2 ** attempt))
+        return max(min_wait, random.uniform(0, upper))
+
+    def _can_retry(exc: BaseException, attempt: int) -> bool:
+        if attempt >= max_attempts:
+            return False
+        if should_retry is not None and not should_retry(exc):
+            return False
+        return True
+
+    def decorator(func: Callable) -> Callable:
+        is_async = inspect.iscoroutinefunction(func)
+        display_name = func.__name__
+
+        if is_async:
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                attempt = 1
+                while True:
+                    try:
+                        return await func(*args, **kwargs)
+                    except retry_on as e:
+                        if not _can_retry(e, attempt):
+                            raise
+                        wait = _wait_seconds(e, attempt)
+                        if verbose:
+                            print(f"⏳ {display_name} 재시도 {attempt}/{max_attempts - 1} ({wait:.1f}초 대기): {e}")
+                        await asyncio.sleep(wait)
+                        attempt += 1
+
+            return async_wrapper
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs) -> Any:
+                attempt = 1
+                while True:
+                    try:
+                        return func(*args, **kwargs)
+                    except retry_on as e:
+                        if not _can_retry(e, attempt):
+                            raise
+                        wait = _wait_seconds(e, attempt)
+                        if verbose:
+                            print(f"⏳ {display_name} 재시도 {attempt}/{max_attempts - 1} ({wait:.1f}초 대기): {e}")
+                        time.sleep(wait)
+                        attempt += 1
+
+            return sync_wrapper
+
+    return decorator
+
+
+def openai_retry_after(error: BaseException) -> Optional[float]:
+    """OpenAI 오류 응답의 retry-after-ms / retry-after 헤더를 초 단위로 반환 (없으면 None)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def is_transient_openai_error(error: BaseException) -> bool:
+    """일시적 OpenAI 오류 여부 (크레딧 부족 insufficient_quota는 재시도해도 소용없으므로 제외)"""
+    return "insufficient_quota" not in str(error).lower()
+
+
+def retry_openai(max_attempts: int = 5, max_wait: float = 30.0, verbose: bool = True):
+    """
+    OpenAI API 호출용 재시도 데코레이터
+
+    429(RateLimitError), 연결 오류, 5xx만 재시도하고 BadRequestError 등은 즉시 전파합니다.
+    서버가 retry-after 헤더를 주면 그 시간을 우선합니다.
+
+    사용 예시:
+        from utils import retry_openai
+
+        @retry_openai()
+        async def _create_completion(self, **kwargs):
+            return await self.client.chat.completions.create(**kwargs)
+    """
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
+    return retry_with_backoff(
+        retry_on=(RateLimitError, APIConnectionError, InternalServerError),
+        max_attempts=max_attempts,
+        max_wait=max_wait,
+        should_retry=is_transient_openai_error,
+        retry_after=openai_retry_after,
+        verbose=verbose,
+    )
+
+
+# 공유 AsyncOpenAI 클라이언트 커넥션 풀 설정 (httpx 기본값 max_connections=100/keepalive=20은 배치 fan-out에 부족)
+OPENAI_MAX_CONNECTIONS = 256
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 128
+OPENAI_TIMEOUT_SECONDS = 60.0
+OPENAI_CONNECT_TIMEOUT_SECONDS = 5.0
+
+# 이벤트 루프별 공유 클라이언트 (httpx 커넥션은 생성된 루프에서만 재사용 가능)
+_shared_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_shared_openai_lock = threading.Lock()
+
+
+def get_async_openai_client():
+    """
+    현재 이벤트 루프에서 공유하는 AsyncOpenAI 클라이언트 반환 (없으면 생성)
+
+    여러 Agent 인스턴스가 커넥션 풀 하나를 함께 쓰도록 해 클라이언트 측 연결 대기를 없앱니다.
+    반드시 코루틴 안에서 호출해야 합니다.
+    """
+    loop = asyncio.get_running_loop()
+    client = _shared_openai_clients.get(loop)
+    if client is not None:
+        return client
+
+    import httpx
+    from openai import AsyncOpenAI
+
+    load_env()
+
+    with _shared_openai_lock:
+        client = _shared_openai_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                # 재시도는 호출부의 @retry_openai(지수 백오프 + RateLimiter)만 담당 (SDK 재시도와 중첩 방지)
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+                ),
+            )
+            _shared_openai_clients[loop] = client
+    return client
+
+
+_shared_openai_sync_client: Any = None
+
+
+def get_openai_client():
+    """
+    프로세스 전체가 공유하는 동기 OpenAI 클라이언트 반환 (없으면 생성)
+
+    임베딩 생성/질의 임베딩 등 동기 코드 경로용입니다. httpx.Client는 스레드 안전하므로
+    asyncio.to_thread로 실행되는 호출끼리도 keep-alive 연결을 재사용합니다.
+    """
+    global _shared_openai_sync_client
+    if _shared_openai_sync_client is not None:
+        return _shared_openai_sync_client
+
+    import httpx
+    from openai import OpenAI
+
+    load_env()
+
+    with _shared_openai_lock:
+        if _shared_openai_sync_client is None:
+            _shared_openai_sync_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                # 재시도는 호출부의 @retry_openai만 담당 (SDK 재시도와 중첩되면 요청 수가 곱해짐)
+                max_retries=0,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+                ),
+            )
+    return _shared_openai_sync_client
+
+
+class TokenBucket:
+    """
+    비동기 토큰 버킷 (capacity개를 period초에 걸쳐 연속적으로 채움)
+
+    analyze_*_sync 전용 루프 등 여러 스레드의 이벤트 루프에서 공유되므로 잔량 보충/차감은
+    threading.Lock으로 보호하고, 대기(asyncio.sleep)는 락 밖에서 합니다.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """호출자가 self._lock을 잡은 상태에서만 호출"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_consume(self, amount: float) -> float:
+        """amount를 차감하면 0, 부족하면 채워질 때까지 기다릴 시간(초)을 반환"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    async def acquire(self, amount: float = 1.0):
+        """amount만큼 차감될 때까지 대기 (capacity보다 큰 요청은 capacity로 잘라 무한 대기 방지)"""
+        amount = min(float(amount), self.capacity)
+        while True:
+            wait = self._try_consume(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def rebase(self, remaining: float):
+        """서버가 알려준 잔여량이 더 적으면 그 값으로 낮춤 (다른 프로세스 사용분 반영)"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+
+# 분당 요청/토큰 한도 기본값 (계정 tier에 맞춰 OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT 환경변수로 조정, 0이면 해당 버킷 비활성화)
+# 환경변수는 load_env() 이후에 읽어야 하므로 모듈 import 시점이 아니라 RateLimiter 생성 시점에 읽음
+DEFAULT_OPENAI_RPM_LIMIT = 500
+DEFAULT_OPENAI_TPM_LIMIT = 200000
+# 요청 토큰 추정 시 더하는 출력 토큰 여유분
+OPENAI_COMPLETION_TOKEN_ESTIMATE = 800
+
+
+class RateLimiter:
+    """
+    OpenAI chat.completions 앞단의 RPM + TPM 이중 토큰 버킷
+
+    요청 전 프롬프트 토큰을 추정해 두 버킷에서 차감하고, 응답의
+    x-ratelimit-remaining-requests / x-ratelimit-remaining-tokens 헤더로 버킷을 보정합니다.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        load_env()
+        if rpm is None:
+            rpm = int(os.getenv("OPENAI_RPM_LIMIT", str(DEFAULT_OPENAI_RPM_LIMIT)))
+        if tpm is None:
+            tpm = int(os.getenv("OPENAI_TPM_LIMIT", str(DEFAULT_OPENAI_TPM_LIMIT)))
+        self.rpm_bucket = TokenBucket(rpm, 60.0) if rpm > 0 else None
+        self.tpm_bucket = TokenBucket(tpm, 60.0) if tpm > 0 else None
+
+    @staticmethod
+    def estimate_tokens(messages: Any) -> int:
+        """토크나이저 없이 메시지 토큰 수 추정 (UTF-8 3바이트≈1토큰) + 출력 여유분"""
+        size = 0
+        for message in messages or []:
+            content = message.get("content") if isinstance(message, dict) else None
+            if isinstance(content, str):
+                size += len(content.encode("utf-8"))
+        return size // 3 + 1 + OPENAI_COMPLETION_TOKEN_ESTIMATE
+
+    async def acquire(self, estimated_tokens: int):
+        if self.rpm_bucket is not None:
+            await self.rpm_bucket.acquire(1)
+        if self.tpm_bucket is not None:
+            await self.tpm_bucket.acquire(estimated_tokens)
+
+    def update_from_headers(self, headers: Any):
+        for bucket, header in (
+            (self.rpm_bucket, "x-ratelimit-remaining-requests"),
+            (self.tpm_bucket, "x-ratelimit-remaining-tokens"),
+        ):
+            value = headers.get(header) if bucket is not None and headers else None
+            if value is None:
+                continue
+            try:
+                bucket.rebase(float(value))
+            except (TypeError, ValueError):
+                continue
+
+    async def chat_completion(self, client: Any, **kwargs):
+        """
+        한도 안에서 client.chat.completions.create 호출 (stream=True 포함)
+
+        응답 헤더를 읽기 위해 with_raw_response로 호출하고 파싱된 결과를 반환합니다.
+        """
+        await self.acquire(self.estimate_tokens(kwargs.get("messages")))
+        raw = await client.chat.completions.with_raw_response.create(**kwargs)
+        self.update_from_headers(raw.headers)
+        return raw.parse()
+
+
+# OpenAI 한도는 모델별로 따로 적용되므로 모델마다 RateLimiter를 둠
+_openai_rate_limiters: Dict[Optional[str], RateLimiter] = {}
+_openai_rate_limiters_lock = threading.Lock()
+
+
+def get_openai_rate_limiter(model: Optional[str] = None) -> RateLimiter:
+    """프로세스 전체가 공유하는 모델별 OpenAI RateLimiter 반환 (없으면 생성)"""
+    with _openai_rate_limiters_lock:
+        limiter = _openai_rate_limiters.get(model)
+        if limiter is None:
+            limiter = RateLimiter()
+            _openai_rate_limiters[model] = limiter
+    return limiter
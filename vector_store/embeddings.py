@@ -5,14 +5,14 @@
 OpenAI Embeddings로 벡터화하여 MongoDB(`cards.embeddings`)에 저장합니다.
 """
 
-import os
 import re
 import html as _html
+from datetime import datetime as dt
 from typing import Any, Dict, List, Optional, Tuple
-from openai import OpenAI
-from dotenv import load_dotenv
+from pymongo import UpdateOne
 
-load_dotenv()
+from database.mongodb_client import MongoDBClient
+from utils import get_openai_client, retry_openai
 
 
 def clean_html(html: str) -> str:
@@ -624,16 +624,46 @@ def create_documents(card_data: Dict) -> Tuple[List[Dict], List[Dict]]:
 class EmbeddingGenerator:
     """임베딩 생성 및 저장 클래스 (MongoDB 전용)"""
 
+    # OpenAI embeddings API 1회 호출당 입력 개수 (보수적 기본값)
+    EMBED_BATCH_SIZE = 128
+    # MongoDB bulk_write 1회당 카드(UpdateOne) 개수
+    MONGO_BATCH_SIZE = 500
+
     def __init__(self):
         """EmbeddingGenerator 초기화 (MongoDB 전용)"""
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # 프로세스 공유 클라이언트 (인스턴스마다 커넥션 풀/TLS 핸드셰이크를 새로 만들지 않음)
+        self.openai_client = get_openai_client()
 
         # MongoDB 연결 (필수)
-        from database.mongodb_client import MongoDBClient
         self.mongo_client = MongoDBClient()
         self.cards_collection = self.mongo_client.get_collection("cards")
         print("✅ EmbeddingGenerator: MongoDB 연결됨")
-    
+
+    def _embed_texts(self, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+        """
+        텍스트 리스트를 임베딩으로 변환 (실패 시 예외 전파)
+
+        Args:
+            texts: 텍스트 리스트
+            batch_size: API 1회 호출당 입력 개수
+
+        Returns:
+            임베딩 벡터 리스트 (texts와 같은 순서)
+        """
+        all_embeddings: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            all_embeddings.extend(self._create_embeddings(texts[i:i + batch_size]))
+        return all_embeddings
+
+    @retry_openai(max_attempts=6, max_wait=60.0)
+    def _create_embeddings(self, batch: List[str]) -> List[List[float]]:
+        """embeddings API 1회 호출 (Rate Limit/일시 오류 시 지수 백오프로 재시도)"""
+        response = self.openai_client.embeddings.create(
+            model="text-embedding-3-small",
+            input=batch
+        )
+        return [item.embedding for item in response.data]
+
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         텍스트 리스트를 임베딩으로 변환
@@ -649,20 +679,103 @@ class EmbeddingGenerator:
         
         # OpenAI API 입력 길이/레이트 제한을 고려해 배치 처리
         try:
-            all_embeddings: List[List[float]] = []
-            batch_size = 128  # 보수적 기본값
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                response = self.openai_client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=batch
-                )
-                all_embeddings.extend([item.embedding for item in response.data])
-            return all_embeddings
+            return self._embed_texts(texts)
         except Exception as e:
             print(f"❌ 임베딩 생성 실패: {e}")
             return []
-    
+
+    def _build_card_fields(
+        self,
+        card_id: int,
+        card_data: Dict,
+        vector_docs: List[Dict],
+        non_vector_docs: List[Dict],
+        embeddings: List[List[float]],
+    ) -> Dict[str, Any]:
+        """
+        카드 문서에 저장할 필드($set) 구성
+
+        Args:
+            card_id: 정규화된 카드 ID
+            card_data: 압축 컨텍스트 Dict
+            vector_docs: 임베딩 대상 문서
+            non_vector_docs: 임베딩하지 않는 설명/필터용 문서
+            embeddings: vector_docs와 같은 순서의 임베딩 벡터
+
+        Returns:
+            MongoDB $set 딕셔너리
+        """
+        # ID 생성 및 임베딩 배열 구성
+        embeddings_array = []
+        for i, (doc, embedding) in enumerate(zip(vector_docs, embeddings)):
+            doc_type = doc["metadata"].get("doc_type", "unknown")
+            text_value = doc.get("text", "") or ""
+
+            # embeddings_array.metadata에는 "표시/필터/랭킹에 필요한 핵심필드"를 충분히 담는다.
+            # - create_*에서 생성한 metadata를 기본으로 유지 + 파생값만 덧붙임
+            md = dict(doc.get("metadata") or {})
+            md.update(
+                {
+                    "card_id": card_id,  # 최상위 키와 일치 강제
+                    "text_len": len(text_value) if isinstance(text_value, str) else 0,
+                }
+            )
+
+            embeddings_array.append({
+                "doc_id": f"{card_id}_{doc_type}_{i}",
+                "doc_type": doc_type,
+                "text": text_value,
+                "embedding": embedding,
+                "metadata": md
+            })
+
+        doc_type_counts: Dict[str, int] = {}
+        for item in embeddings_array:
+            doc_type_counts[item["doc_type"]] = doc_type_counts.get(item["doc_type"], 0) + 1
+
+        # non-vector 문서(설명/필터용) 저장 배열 구성
+        non_vector_array = []
+        for j, doc in enumerate(non_vector_docs):
+            doc_type = (doc.get("metadata") or {}).get("doc_type", "unknown")
+            text_value = doc.get("text", "") or ""
+            md = dict(doc.get("metadata") or {})
+            md.update(
+                {
+                    "card_id": card_id,
+                    "text_len": len(text_value) if isinstance(text_value, str) else 0,
+                }
+            )
+            non_vector_array.append(
+                {
+                    "doc_id": f"{card_id}_{doc_type}_nv_{j}",
+                    "doc_type": doc_type,
+                    "text": text_value,
+                    "metadata": md,
+                }
+            )
+
+        # 카드 전체 context + embeddings
+        meta = dict(card_data.get("meta", {}) or {})
+        # meta.id도 card_id와 일치시키면 운영에서 키 혼선이 줄어듭니다.
+        meta["id"] = card_id
+
+        return {
+            "card_id": card_id,
+            "meta": meta,
+            "conditions": card_data.get("conditions", {}),
+            "fees": card_data.get("fees", {}),
+            "hints": card_data.get("hints", {}),
+            "benefits_html": card_data.get("benefits_html", []),
+            "is_discon": False,
+            "embeddings": embeddings_array,
+            "embeddings_count": len(embeddings_array),
+            # 관리자 통계용 doc_type별 청크 수 (조회 시 $unwind 없이 합산)
+            "doc_type_counts": doc_type_counts,
+            "non_vector_docs": non_vector_array,
+            "non_vector_docs_count": len(non_vector_array),
+            "updated_at": dt.utcnow()
+        }
+
     def add_card(self, card_data: Dict, overwrite: bool = False):
         """
         카드를 문서로 분해하고 MongoDB에 임베딩 추가
@@ -706,76 +819,10 @@ class EmbeddingGenerator:
 
         # MongoDB에 저장
         try:
-            from datetime import datetime as dt
-
-            # ID 생성 및 임베딩 배열 구성
-            embeddings_array = []
-            for i, (doc, embedding) in enumerate(zip(vector_docs, embeddings)):
-                doc_type = doc["metadata"].get("doc_type", "unknown")
-                text_value = doc.get("text", "") or ""
-
-                # embeddings_array.metadata에는 "표시/필터/랭킹에 필요한 핵심필드"를 충분히 담는다.
-                # - create_*에서 생성한 metadata를 기본으로 유지 + 파생값만 덧붙임
-                md = dict(doc.get("metadata") or {})
-                md.update(
-                    {
-                        "card_id": card_id,  # 최상위 키와 일치 강제
-                        "text_len": len(text_value) if isinstance(text_value, str) else 0,
-                    }
-                )
-
-                embeddings_array.append({
-                    "doc_id": f"{card_id}_{doc_type}_{i}",
-                    "doc_type": doc_type,
-                    "text": text_value,
-                    "embedding": embedding,
-                    "metadata": md
-                })
-
-            # non-vector 문서(설명/필터용) 저장 배열 구성
-            non_vector_array = []
-            for j, doc in enumerate(non_vector_docs):
-                doc_type = (doc.get("metadata") or {}).get("doc_type", "unknown")
-                text_value = doc.get("text", "") or ""
-                md = dict(doc.get("metadata") or {})
-                md.update(
-                    {
-                        "card_id": card_id,
-                        "text_len": len(text_value) if isinstance(text_value, str) else 0,
-                    }
-                )
-                non_vector_array.append(
-                    {
-                        "doc_id": f"{card_id}_{doc_type}_nv_{j}",
-                        "doc_type": doc_type,
-                        "text": text_value,
-                        "metadata": md,
-                    }
-                )
-
-            # MongoDB 업데이트 (카드 전체 context + embeddings)
-            meta = dict(card_data.get("meta", {}) or {})
-            # meta.id도 card_id와 일치시키면 운영에서 키 혼선이 줄어듭니다.
-            meta["id"] = card_id
-
+            fields = self._build_card_fields(card_id, card_data, vector_docs, non_vector_docs, embeddings)
             self.cards_collection.update_one(
                 {"card_id": card_id},  # 유일키는 card_id로 고정(권장: unique index)
-                {
-                    "$set": {
-                        "card_id": card_id,
-                        "meta": meta,
-                        "conditions": card_data.get("conditions", {}),
-                        "fees": card_data.get("fees", {}),
-                        "hints": card_data.get("hints", {}),
-                        "benefits_html": card_data.get("benefits_html", []),
-                        "is_discon": False,
-                        "embeddings": embeddings_array,
-                        "embeddings_count": len(embeddings_array),
-                        "non_vector_docs": non_vector_array,
-                        "non_vector_docs_count": len(non_vector_array),
-                        "updated_at": dt.utcnow()
-                    }
-                },
+                {"$set": fields},
                 upsert=True  # 문서가 없으면 생성
             )
             print(
@@ -785,7 +832,113 @@ class EmbeddingGenerator:
         except Exception as e:
             print(f"❌ MongoDB 임베딩 저장 실패 (card_id={card_id}): {e}")
             raise
-    
+
+    def add_cards_bulk(
+        self,
+        card_data_list: List[Dict],
+        overwrite: bool = False,
+        embed_batch: int = EMBED_BATCH_SIZE,
+        mongo_batch: int = MONGO_BATCH_SIZE,
+    ) -> Dict[str, List[Dict]]:
+        """
+        여러 카드를 한 번에 임베딩하여 MongoDB에 저장
+
+        카드별로 API/DB를 왕복하지 않고, 모든 카드의 청크 텍스트를 모아
+        embed_batch 단위로 임베딩을 요청한 뒤 mongo_batch 단위 bulk_write로 저장합니다.
+        임베딩 API 오류(rate limit, quota 등)는 호출자에게 그대로 전파합니다.
+
+        Args:
+            card_data_list: 압축 컨텍스트 Dict 리스트
+            overwrite: 기존 임베딩이 있어도 다시 생성할지 여부
+            embed_batch: OpenAI embeddings API 1회 호출당 입력 개수
+            mongo_batch: bulk_write 1회당 카드 수
+
+        Returns:
+            {"success": [...], "failed": [...], "skipped": [...]}
+        """
+        results: Dict[str, List[Dict]] = {"success": [], "failed": [], "skipped": []}
+
+        # 1) card_id 정규화
+        cards: List[Tuple[int, Dict]] = []
+        for card_data in card_data_list:
+            card_id = _normalize_card_id((card_data.get("meta") or {}).get("id"))
+            if not card_id:
+                results["skipped"].append({"card_id": None, "reason": "카드 ID 없음"})
+                continue
+            cards.append((card_id, card_data))
+
+        # 2) 기존 임베딩 확인 (카드별 find_one 대신 $in 한 번)
+        if not overwrite and cards:
+            existing_ids = {
+                doc["card_id"]
+                for doc in self.cards_collection.find(
+                    {"card_id": {"$in": [cid for cid, _ in cards]}, "embeddings.0": {"$exists": True}},
+                    {"_id": 0, "card_id": 1},
+                )
+            }
+            remaining = []
+            for card_id, card_data in cards:
+                if card_id in existing_ids:
+                    results["skipped"].append({"card_id": card_id, "reason": "이미 임베딩 존재"})
+                else:
+                    remaining.append((card_id, card_data))
+            cards = remaining
+
+        # 3) 문서 생성 후 청크 텍스트 평탄화
+        prepared: List[Tuple[int, Dict, List[Dict], List[Dict]]] = []
+        texts: List[str] = []
+        for card_id, card_data in cards:
+            vector_docs, non_vector_docs = create_documents(card_data)
+            if not vector_docs and not non_vector_docs:
+                results["skipped"].append({"card_id": card_id, "reason": "문서 생성 실패"})
+                continue
+            prepared.append((card_id, card_data, vector_docs, non_vector_docs))
+            texts.extend(doc["text"] for doc in vector_docs)
+
+        if not prepared:
+            return results
+
+        # 4) 임베딩 일괄 생성
+        embeddings = self._embed_texts(texts, batch_size=embed_batch) if texts else []
+        if len(embeddings) != len(texts):
+            raise ValueError(f"임베딩 개수 불일치 (요청 {len(texts)}개, 응답 {len(embeddings)}개)")
+
+        # 5) UpdateOne 구성 및 bulk_write
+        ops: List[Any] = []
+        pending: List[Tuple[int, Dict]] = []
+
+        def flush():
+            if not ops:
+                return
+            try:
+                self.cards_collection.bulk_write(ops, ordered=False)
+                for cid, data in pending:
+                    results["success"].append({"card_id": cid, "name": (data.get("meta") or {}).get("name", "")})
+            except Exception as e:
+                print(f"❌ MongoDB bulk_write 실패 ({len(ops)}개): {e}")
+                for cid, _data in pending:
+                    results["failed"].append({"card_id": cid, "error": str(e)})
+            ops.clear()
+            pending.clear()
+
+        offset = 0
+        for card_id, card_data, vector_docs, non_vector_docs in prepared:
+            card_embeddings = embeddings[offset:offset + len(vector_docs)]
+            offset += len(vector_docs)
+
+            fields = self._build_card_fields(card_id, card_data, vector_docs, non_vector_docs, card_embeddings)
+            ops.append(UpdateOne({"card_id": card_id}, {"$set": fields}, upsert=True))
+            pending.append((card_id, card_data))
+            if len(ops) >= mongo_batch:
+                flush()
+        flush()
+
+        print(
+            f"✅ 배치 임베딩 저장 완료: 성공 {len(results['success'])}개, "
+            f"실패 {len(results['failed'])}개, 건너뜀 {len(results['skipped'])}개 (청크 {len(texts)}개)"
+        )
+        return results
+
     def add_cards_batch(self, card_data_list: List[Dict], overwrite: bool = False):
         """
         여러 카드를 배치로 추가
@@ -794,8 +947,7 @@ class EmbeddingGenerator:
             card_data_list: 압축 컨텍스트 Dict 리스트
             overwrite: 기존 문서 덮어쓰기 여부
         """
-        for card_data in card_data_list:
-            self.add_card(card_data, overwrite=overwrite)
+        return self.add_cards_bulk(card_data_list, overwrite=overwrite)
 
 
 # 사용 예시
@@ -8,11 +8,8 @@ MongoDB Vector Search에서 벡터 검색을 수행하고,
 import math
 import re
 from typing import Any, Dict, Iterable, List, Optional, Tuple
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from utils import get_openai_client, retry_openai
 
 
 class CardVectorStore:
@@ -20,7 +17,8 @@ class CardVectorStore:
 
     def __init__(self):
         """CardVectorStore 초기화 (MongoDB 전용)"""
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # 프로세스 공유 클라이언트 (인스턴스마다 커넥션 풀/TLS 핸드셰이크를 새로 만들지 않음)
+        self.openai_client = get_openai_client()
 
         # MongoDB 연결 (필수)
         from database.mongodb_client import MongoDBClient
@@ -39,13 +37,18 @@ class CardVectorStore:
             임베딩 벡터
         """
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=[query_text]
-            )
+            response = self._create_query_embedding(query_text)
             return response.data[0].embedding
         except Exception as e:
             raise ValueError(f"임베딩 생성 실패: {e}")
+
+    @retry_openai(max_attempts=3)
+    def _create_query_embedding(self, query_text: str):
+        """질의 임베딩 API 호출 (공유 클라이언트는 SDK 재시도가 꺼져 있으므로 여기서 재시도)"""
+        return self.openai_client.embeddings.create(
+            model="text-embedding-3-small",
+            input=[query_text]
+        )
     
     def _build_mongodb_filter(self, filters: Optional[Dict]) -> Dict:
         """